@@ -7,6 +7,9 @@ from task import Task
 from common import *
 from obstacle import Obstacle
 from drone import *
+from repo_modules import load, profiler
+
+cached_solve = load("plan_cache").cached_solve
 
 plt.rcParams["font.family"] = [
     "PingFang SC",
@@ -38,6 +41,16 @@ def generate_tasks():
     # ]
 
 
+# 带磁盘缓存的任务分配：无人机状态、任务和障碍物都相同时直接返回上次的结果，
+# 未命中时就地修改并返回传入的 drones、tasks，调用方统一使用返回值
+def assign_tasks_cached(drones, tasks, obstacle=None):
+    def solve():
+        with profiler.phase("assign_tasks"):
+            assign_tasks(drones, tasks, obstacle)
+        return drones, tasks
+    return cached_solve("Cluster.T1_Cluster.assign_tasks/v2", (drones, tasks, obstacle), solve)
+
+
 # 简单贪心规划任务
 def assign_tasks(
     drones: list[Drone], tasks: list[Task], obstacle: Obstacle | None = None
@@ -67,9 +80,13 @@ def assign_tasks(
         return None
 
     def circumvent_obstacle(start, end, obstacle):
-        # Simple detour: move tangentially to the obstacle for 100m, then toward end
+        # 返回从 start 飞到 end 依次经过的点（不含 start）：被障碍挡住时走切线-圆弧-切线的最短绕行路线
         if not obstacle or not obstacle.is_blocked(start, end):
-            return end
+            return [end]
+        route = obstacle.detour(start, end)
+        if route is not None:
+            return route[0][1:]
+        # 起点或终点在障碍圆内，无法绕行：沿切向移动100m
         sx, sy = start
         ex, ey = end
         cx, cy = obstacle.center
@@ -85,7 +102,13 @@ def assign_tasks(
         # Move 100m along tangent
         detour_x = sx + tx * 100
         detour_y = sy + ty * 100
-        return (detour_x, detour_y)
+        return [(detour_x, detour_y)]
+
+    # 依次飞过各点，中途电量不够时停下
+    def fly_through(drone, waypoints):
+        for point in waypoints:
+            if not drone.move_to(point):
+                break
 
     breakthrough = True
     while any(not t.assigned for t in unassigned):
@@ -107,9 +130,7 @@ def assign_tasks(
                         target_y = dy + vec_y * ratio
                         target = (target_x, target_y)
                         # Circumvent obstacle if needed
-                        if obstacle:
-                            target = circumvent_obstacle((dx, dy), target, obstacle)
-                        d.move_to(target)
+                        fly_through(d, circumvent_obstacle((dx, dy), target, obstacle))
                 continue
             elif status == "close":
                 print(f"⚠️ Drones {d1.id} and {d2.id} are too close ({dist:.2f}m). Moving them apart.")
@@ -126,11 +147,8 @@ def assign_tasks(
                     # d2 moves away from d1
                     t2 = (dx2 - vec_x * ratio, dy2 - vec_y * ratio)
                     # Circumvent obstacle if needed
-                    if obstacle:
-                        t1 = circumvent_obstacle((dx1, dy1), t1, obstacle)
-                        t2 = circumvent_obstacle((dx2, dy2), t2, obstacle)
-                    d1.move_to(t1)
-                    d2.move_to(t2)
+                    fly_through(d1, circumvent_obstacle((dx1, dy1), t1, obstacle))
+                    fly_through(d2, circumvent_obstacle((dx2, dy2), t2, obstacle))
                 continue
 
         if not breakthrough or check_need_return(drones):
@@ -237,7 +255,7 @@ def solve_problem1():
     ]
     tasks = generate_tasks()
     obstacle = None
-    assign_tasks(drones, tasks, obstacle)
+    drones, tasks = assign_tasks_cached(drones, tasks, obstacle)
     for drone in drones:
         print(
             f"Drone {drone.id} total time: {drone.time_used:.2f}s, path: {drone.path}"
@@ -263,7 +281,7 @@ def solve_problem2():
     tasks = generate_tasks()
     # 先执行100s
     obstacle = None
-    assign_tasks(drones, tasks, obstacle)
+    drones, tasks = assign_tasks_cached(drones, tasks, obstacle)
     # 模拟100s后插入障碍和紧急任务
     print("\n[100s] 新增障碍和紧急目标点 T6")
     obstacle = Obstacle((900, 250), 100)
@@ -278,7 +296,7 @@ def solve_problem2():
         d.path = [d.current_pos]
         d.time_used = 0
         d.remaining_time = d.max_time
-    assign_tasks(drones, tasks, obstacle)
+    drones, tasks = assign_tasks_cached(drones, tasks, obstacle)
     for drone in drones:
         print(
             f"Drone {drone.id} total time: {drone.time_used:.2f}s, path: {drone.path}"
@@ -316,7 +334,7 @@ def solve_problem3():
     ]
     tasks = generate_problem3_tasks()
     obstacle = None
-    assign_tasks(drones, tasks, obstacle)
+    drones, tasks = assign_tasks_cached(drones, tasks, obstacle)
     for drone in drones:
         print(
             f"Drone {drone.id} 总用时: {drone.time_used:.2f}s, 路径: {drone.path}, 充电次数: {drone.charge_cycle}"
@@ -1,5 +1,6 @@
 from common import *
 import math
+from repo_modules import profiler
 
 
 # 无人机类
@@ -18,6 +19,8 @@ class Drone:
         self.charge_cycle = 0  # 充电次数
 
     def distance(self, pos):
+        if profiler.enabled:
+            profiler.count("distance")
         return math.hypot(self.current_pos[0] - pos[0], self.current_pos[1] - pos[1])
 
     def move_to(self, pos, task_time=0):
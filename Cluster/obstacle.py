@@ -1,3 +1,7 @@
+import math
+from repo_modules import profiler
+
+
 # 障碍物
 class Obstacle:
     def __init__(self, center, radius):
@@ -18,6 +22,8 @@ class Obstacle:
         Returns:
         - True if the segment intersects the circle, False otherwise.
         """
+        if profiler.enabled:
+            profiler.count("obstacle.is_blocked")
         x1, y1 = p1
         x2, y2 = p2
         cx, cy = self.center
@@ -41,3 +47,58 @@ class Obstacle:
 
         # Intersection if distance <= radius^2
         return dist_sq <= self.radius**2
+
+    def detour(self, p1, p2, arc_step=math.radians(10)):
+        # 单个障碍圆下 p1 到 p2 的最短路（闭式解）：切线 - 圆弧 - 切线，顺、逆时针两侧取短的一侧
+        """
+        Shortest path from p1 to p2 around the circle: tangent, arc along the circle, tangent.
+
+        Parameters:
+        - p1, p2: tuples (x, y), both outside the circle.
+        - arc_step: maximum angle per polyline piece used to draw the arc.
+
+        Returns:
+        - (waypoints, length): waypoints start with p1 and end with p2. The arc is drawn as a
+          polyline whose pieces are tangent to the circle. length is the exact
+          tangent + arc + tangent length. Returns ([p1, p2], straight distance) if the segment
+          is not blocked.
+        - None if p1 or p2 lies inside the circle.
+        """
+        if profiler.enabled:
+            profiler.count("obstacle.detour")
+        cx, cy = self.center
+        r = self.radius
+        d1 = math.hypot(p1[0] - cx, p1[1] - cy)
+        d2 = math.hypot(p2[0] - cx, p2[1] - cy)
+        if d1 < r or d2 < r:
+            return None
+        if not self.is_blocked(p1, p2):
+            return [p1, p2], math.hypot(p2[0] - p1[0], p2[1] - p1[1])
+
+        phi1 = math.atan2(p1[1] - cy, p1[0] - cx)
+        phi2 = math.atan2(p2[1] - cy, p2[0] - cx)
+        alpha1 = math.acos(r / d1)
+        alpha2 = math.acos(r / d2)
+        tangents = math.sqrt(d1 * d1 - r * r) + math.sqrt(d2 * d2 - r * r)
+        # 逆时针：在 phi1+alpha1 处切入、phi2-alpha2 处切出；顺时针对称
+        best = None
+        for sign in (1, -1):
+            enter = phi1 + sign * alpha1
+            leave = phi2 - sign * alpha2
+            sweep = sign * ((sign * (leave - enter)) % (2 * math.pi))
+            length = tangents + r * abs(sweep)
+            if best is None or length < best[0]:
+                best = (length, enter, sweep)
+        length, enter, sweep = best
+
+        # 圆弧画成外切折线：拐点在半径 r / cos(delta / 2) 上，每段都与圆相切
+        m = max(1, math.ceil(abs(sweep) / arc_step))
+        delta = sweep / m
+        outer = r / math.cos(delta / 2)
+        waypoints = [p1, (cx + r * math.cos(enter), cy + r * math.sin(enter))]
+        for k in range(m):
+            theta = enter + (k + 0.5) * delta
+            waypoints.append((cx + outer * math.cos(theta), cy + outer * math.sin(theta)))
+        waypoints.append((cx + r * math.cos(enter + sweep), cy + r * math.sin(enter + sweep)))
+        waypoints.append(p2)
+        return waypoints, length
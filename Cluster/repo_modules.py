@@ -0,0 +1,34 @@
+import os
+import sys
+import importlib
+import importlib.util
+
+# 仓库根目录下的公共模块（instrument.py 的埋点、plan_cache.py 的结果缓存、instances.py 的测试实例）
+# 根目录已在搜索路径上（如从 benchmark.py 运行）时直接导入；否则按文件路径加载一次并登记到 sys.modules，
+# 不改动 sys.path，所以在 VRP/、Cluster/ 里直接运行脚本或单独导入模块都能用
+# VRP/repo_modules.py 与本文件相同
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# name 为根目录下的模块名，子目录里的模块用点号分隔，如 "Cluster.obstacle"
+def load(name):
+    if name in sys.modules:
+        return sys.modules[name]
+    try:
+        return importlib.import_module(name)
+    except ModuleNotFoundError as error:
+        if not name.startswith(error.name or ""):
+            raise
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, *name.split(".")) + ".py")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[name]
+        raise
+    return module
+
+
+profiler = load("instrument").profiler
@@ -1,68 +1,406 @@
 import math
-import itertools
+import os
+import time
+import multiprocessing
+from collections import OrderedDict
+from multiprocessing import shared_memory
+import numpy as np
 
 points = [
     (1200, 800),
     (300, 450),
     (950, 200),
     (600, 1200),
-    (1500, 500),  
+    (1500, 500),
 ]
 
+depot = (0, 0)
+num_drones = 3
+
 def Euclidean_distance(p1, p2):
     return math.sqrt((p1[0] - p2[0])**2 + (p1[1] - p2[1])**2)
 
-def distance_group(group_indices):
-    if not group_indices:
-        return 0.0
-    group_points = [points[i] for i in group_indices]
-    min_dist = float('inf')
-    for perm in itertools.permutations(group_points):
-        current_dist = Euclidean_distance((0, 0), perm[0])
-        for i in range(1, len(perm)):
-            current_dist += Euclidean_distance(perm[i-1], perm[i])
-        if current_dist < min_dist:
-            min_dist = current_dist
-    return min_dist
-
-groups = []
-
-for three in itertools.combinations(range(5), 3):
-    remain_points = list(set(range(5)) - set(three))
-    groups.append([list(three), [remain_points[0]], [remain_points[1]]])
-
-for single in range(5):  
-    remaining = list(set(range(5)) - {single})
-    pairs = []
-    seen = set()
-    for pair in itertools.combinations(remaining, 2):  
-        sorted_pair = tuple(sorted(pair))
-        complement = tuple(sorted(set(remaining) - set(pair)))
-        if (sorted_pair, complement) not in seen and (complement, sorted_pair) not in seen:
-            seen.add((sorted_pair, complement))
-            pairs.append((list(sorted_pair), list(complement)))
-    for pair1, pair2 in pairs[:3]:
-        groups.append([[single], pair1, pair2])
-
-min_total = float('inf')
-best_group = None
-for group in groups:
+# 距离矩阵：下标0为基地，下标 i+1 为第 i 个目标点
+def build_distance_matrix(points, depot=depot):
+    coords = np.array([depot] + list(points), dtype=float)
+    diff = coords[:, None, :] - coords[None, :, :]
+    return np.sqrt((diff ** 2).sum(axis=-1))
+
+def popcounts(n):
+    counts = np.zeros(1 << n, dtype=np.int64)
+    for j in range(n):
+        counts += (np.arange(1 << n) >> j) & 1
+    return counts
+
+# Held-Karp 状压DP：dp[mask, j] 为从基地出发、访问完 mask 中所有目标并停在 j 的最短距离
+# 按集合大小分层，每层对所有 mask 一次向量化转移，复杂度 O(n^2 * 2^n)
+def held_karp(dist):
+    n = len(dist) - 1
+    d = dist[1:, 1:]
+    dp = np.full((1 << n, n), np.inf)
+    for j in range(n):
+        dp[1 << j, j] = dist[0, j + 1]
+    masks = np.arange(1 << n)
+    counts = popcounts(n)
+    for size in range(2, n + 1):
+        layer = masks[counts == size]
+        for j in range(n):
+            sel = layer[(layer >> j) & 1 == 1]
+            prev = sel ^ (1 << j)
+            dp[sel, j] = (dp[prev] + d[:, j]).min(axis=1)
+    return dp
+
+# 每个子集的最短开放路径长度（不返航），空集记为0
+def subset_costs(dp):
+    cost = dp.min(axis=1)
+    cost[0] = 0.0
+    return cost
+
+# 由DP表回溯出 mask 的最优访问顺序
+def held_karp_path(dp, dist, mask):
+    if mask == 0:
+        return []
+    d = dist[1:, 1:]
+    j = int(np.argmin(dp[mask]))
+    order = [j]
+    while mask != 1 << j:
+        prev = mask ^ (1 << j)
+        i = int(np.argmin(dp[prev] + d[:, j]))
+        order.append(i)
+        mask, j = prev, i
+    return order[::-1]
+
+# 对一批大小相同的 mask 求 min cost[group] + f[mask ^ group]，group 取遍包含 mask 最低位的子集
+# mask 多而子集少时对子集做格雷码枚举、按 mask 向量化；反之逐个 mask 对其全部子集向量化
+def best_split(cost, f, masks, n):
+    bits = (masks[:, None] >> np.arange(n)) & 1
+    size = int(bits[0].sum())
+    values = np.nonzero(bits)[1].reshape(len(masks), size)
+    values = np.int64(1) << values
+    low = values[:, 0]
+    if len(masks) >= 1 << (size - 1):
+        sub = np.zeros(len(masks), dtype=np.int64)
+        best = cost[low] + f[masks ^ low]
+        best_group = low.copy()
+        for t in range(1, 1 << (size - 1)):
+            # 格雷码相邻两项只差一位，该位即 t 的最低位（values 第0列为最低位，故下标恰好错开1）
+            sub ^= values[:, (t & -t).bit_length()]
+            group = low | sub
+            value = cost[group] + f[masks ^ group]
+            better = value < best
+            best = np.where(better, value, best)
+            best_group = np.where(better, group, best_group)
+        return best, best_group
+    best = np.empty(len(masks))
+    best_group = np.empty(len(masks), dtype=np.int64)
+    for r, mask in enumerate(masks):
+        subs = np.zeros(1, dtype=np.int64)
+        for v in values[r, 1:]:
+            subs = np.concatenate([subs, subs | v])
+        group = low[r] | subs
+        value = cost[group] + f[mask ^ group]
+        i = int(np.argmin(value))
+        best[r] = value[i]
+        best_group[r] = group[i]
+    return best, best_group
+
+# 子集DP：f[k][mask] 为把 mask 恰好分成 k 个非空组的最小距离和
+# 每次固定 mask 最低位所在的组，避免同一划分被重复枚举，复杂度 O(m * 3^n)
+def split_targets(cost, n, m):
+    if m > n:
+        raise ValueError(f"目标点数 {n} 少于无人机数 {m}，无法保证每架无人机至少一个目标")
+    full = (1 << n) - 1
+    masks = np.arange(1 << n, dtype=np.int64)
+    counts = popcounts(n)
+    f = cost.copy()
+    f[0] = np.inf
+    choices = []
+    for k in range(2, m + 1):
+        g = np.full(1 << n, np.inf)
+        choice = np.zeros(1 << n, dtype=np.int64)
+        if k == m:
+            layers = [masks[full:]]
+        else:
+            # 中间层只会用到不含目标0的 mask，且要给后面的组至少各留一个目标
+            free = masks[(masks & 1) == 0]
+            free_counts = counts[free]
+            layers = [free[free_counts == size] for size in range(k, n - (m - k) + 1)]
+        for layer in layers:
+            if len(layer) == 0:
+                continue
+            g[layer], choice[layer] = best_split(cost, f, layer, n)
+        f = g
+        choices.append(choice)
+    # 回溯出每架无人机的目标子集
+    groups = []
+    mask = full
+    for choice in reversed(choices):
+        group = int(choice[mask])
+        groups.append(group)
+        mask ^= group
+    groups.append(mask)
+    return float(f[full]), groups
+
+# 精确求解：所有子集的开放路径只算一次，再做子集划分DP
+def solve(points, m, depot=depot):
+    n = len(points)
+    dist = build_distance_matrix(points, depot)
+    dp = held_karp(dist)
+    cost = subset_costs(dp)
+    total, masks = split_targets(cost, n, m)
+    best_group = [held_karp_path(dp, dist, mask) for mask in masks]
+    return total, best_group
+
+# 最小生成树下界：m 条从基地出发的路径合起来是一棵覆盖基地和所有目标的生成树
+def mst_lower_bound(dist):
+    n = len(dist)
+    in_tree = np.zeros(n, dtype=bool)
+    in_tree[0] = True
+    key = dist[0].copy()
     total = 0.0
-    for subgroup in group:
-        total += distance_group(subgroup)
-    if total < min_total:
-        min_total = total
-        best_group = group
+    for _ in range(n - 1):
+        key[in_tree] = np.inf
+        j = int(np.argmin(key))
+        total += key[j]
+        in_tree[j] = True
+        key = np.minimum(key, dist[j])
+    return total
+
+# 部分划分的下界：已有各组的路径只增不减；剩余目标中最难插入的那个至少带来该插入代价；
+# 还没开的组至少各要从基地飞到一个剩余目标
+def partition_lower_bound(cost, dist, groups, i, n, m):
+    base = sum(cost[g] for g in groups)
+    if i == n:
+        return base
+    opened = len(groups)
+    insert = 0.0
+    for j in range(i, n):
+        bit = 1 << j
+        best = min(cost[g | bit] - cost[g] for g in groups)
+        if opened < m:
+            best = min(best, dist[0, j + 1])
+        insert = max(insert, best)
+    fresh = (m - opened) * dist[0, i + 1:].min()
+    return base + max(insert, fresh)
+
+# 分支定界：按受限增长串（restricted growth string）枚举 n 个目标分成 m 个非空组的划分，
+# 第 i 个目标只能进已开的组或新开下一组，每个划分恰好出现一次（共 S(n, m) 个，斯特林数）
+# 超过 time_limit 秒或 node_limit 个结点时提前停止，返回当前最优解和最优性间隙
+# callback(总距离, 各组访问顺序, 已用秒数) 在每次找到更好的可行解时调用，可边搜边拿到当前最优
+def branch_and_bound(points, m, depot=depot, time_limit=None, node_limit=None, callback=None):
+    n = len(points)
+    if m > n:
+        raise ValueError(f"目标点数 {n} 少于无人机数 {m}，无法保证每架无人机至少一个目标")
+    start = time.perf_counter()
+    dist = build_distance_matrix(points, depot)
+    dp = held_karp(dist)
+    cost = subset_costs(dp)
+    root_bound = mst_lower_bound(dist)
+
+    best_total = float("inf")
+    best_masks = None
+    nodes = 0
+    stopped = False
+    # 显式栈做深度优先，栈中每项都带着入栈时的下界，提前停止时用来估计间隙
+    stack = [(0.0, 0, ())]
+    while stack:
+        if (time_limit is not None and time.perf_counter() - start > time_limit) or (
+            node_limit is not None and nodes >= node_limit
+        ):
+            stopped = True
+            break
+        lb, i, groups = stack.pop()
+        if lb >= best_total:
+            continue
+        nodes += 1
+        if i == n:
+            best_total = float(lb)
+            best_masks = groups
+            if callback is not None:
+                callback(best_total, [held_karp_path(dp, dist, mask) for mask in groups],
+                         time.perf_counter() - start)
+            continue
+        bit = 1 << i
+        children = []
+        for g in range(len(groups)):
+            children.append(groups[:g] + (groups[g] | bit,) + groups[g + 1:])
+        if len(groups) < m:
+            children.append(groups + (bit,))
+        pushed = []
+        for child in children:
+            # 剩下的目标不够把所有组开满就不用再往下搜
+            if n - i - 1 < m - len(child):
+                continue
+            child_lb = partition_lower_bound(cost, dist, child, i + 1, n, m)
+            if child_lb < best_total:
+                pushed.append((child_lb, i + 1, child))
+        # 下界小的孩子后入栈、先展开，尽早得到好的可行解
+        stack.extend(sorted(pushed, reverse=True))
+
+    if stopped:
+        frontier = min((entry[0] for entry in stack), default=best_total)
+        lower = max(root_bound, min(best_total, frontier))
+    else:
+        lower = best_total
+    gap = float((best_total - lower) / best_total) if best_masks is not None else None
+    best_group = (
+        [held_karp_path(dp, dist, mask) for mask in best_masks] if best_masks is not None else None
+    )
+    return best_total, best_group, gap, nodes
+
+# ---------------- 多进程划分枚举 ----------------
+# 距离矩阵只在主进程算一次，放进共享内存；各子进程挂载同一块内存，直接按下标读，不再重复计算或拷贝
+_worker = {}
+# 每个子进程的 Held-Karp 备忘最多保留的子集数，超出时丢掉最久没用到的（LRU），
+# 不设上限时最多有 2^n 个子集、每个 n 个值，n=20 时单个进程就要几百 MB
+ENDS_LIMIT = 1 << 17
+
+def _init_worker(shm_name, shape, best_value):
+    # 子进程只读挂载，由主进程统一 unlink
+    shm = shared_memory.SharedMemory(name=shm_name)
+    dist = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    _worker["shm"] = shm
+    _worker["dist"] = dist
+    _worker["best"] = best_value
+    _worker["ends"] = OrderedDict()
+
+# 懒惰的 Held-Karp：访问 mask 并停在 j 的最短开放路径长度 ends[j]（j 不在 mask 中为 inf），
+# 每个子进程内按 LRU 备忘，被淘汰的子集再用到时重算
+def _path_ends(mask):
+    cache = _worker["ends"]
+    ends = cache.get(mask)
+    if ends is not None:
+        cache.move_to_end(mask)
+        return ends
+    dist = _worker["dist"]
+    ends = np.full(dist.shape[0] - 1, np.inf)
+    if mask & (mask - 1) == 0:
+        j = mask.bit_length() - 1
+        ends[j] = dist[0, j + 1]
+    else:
+        rest = mask
+        while rest:
+            bit = rest & -rest
+            rest ^= bit
+            j = bit.bit_length() - 1
+            ends[j] = (_path_ends(mask ^ bit) + dist[1:, j + 1]).min()
+    cache[mask] = ends
+    if len(cache) > ENDS_LIMIT:
+        cache.popitem(last=False)
+    return ends
+
+def _path_cost(mask):
+    if mask == 0:
+        return 0.0
+    return float(_path_ends(mask).min())
+
+def _path_order(mask):
+    dist = _worker["dist"]
+    j = int(np.argmin(_path_ends(mask)))
+    order = [j]
+    while mask != 1 << j:
+        mask ^= 1 << j
+        j = int(np.argmin(_path_ends(mask) + dist[1:, order[-1] + 1]))
+        order.append(j)
+    return order[::-1]
+
+# 受限增长串的前缀，每个前缀对应划分空间中互不相交的一块
+def rgs_prefixes(depth, n, m):
+    prefixes = [((0,), 1)]
+    for i in range(1, depth):
+        extended = []
+        for prefix, opened in prefixes:
+            for label in range(min(opened + 1, m)):
+                new_opened = max(opened, label + 1)
+                if n - i - 1 >= m - new_opened:
+                    extended.append((prefix + (label,), new_opened))
+        prefixes = extended
+    return [prefix for prefix, _ in prefixes]
+
+# 子进程：枚举某个前缀下的全部划分，已开各组的路径长度之和超过全局最优时剪枝
+def _search_chunk(args):
+    prefix, n, m = args
+    best_value = _worker["best"]
+    groups = [0] * m
+    for i, label in enumerate(prefix):
+        groups[label] |= 1 << i
+    opened = max(prefix) + 1
+    best = [float("inf"), None]
+
+    def dfs(i, opened, total):
+        if total >= best_value.value or total >= best[0]:
+            return
+        if i == n:
+            best[0] = total
+            best[1] = list(groups)
+            with best_value.get_lock():
+                if total < best_value.value:
+                    best_value.value = total
+            return
+        bit = 1 << i
+        for label in range(min(opened + 1, m)):
+            new_opened = max(opened, label + 1)
+            if n - i - 1 < m - new_opened:
+                continue
+            old = groups[label]
+            groups[label] = old | bit
+            dfs(i + 1, new_opened, total - _path_cost(old) + _path_cost(old | bit))
+            groups[label] = old
+
+    dfs(len(prefix), opened, sum(_path_cost(g) for g in groups))
+    if best[1] is None:
+        return best[0], None
+    return best[0], [_path_order(g) for g in best[1]]
+
+# 并行枚举：把划分空间按受限增长串前缀切块，进程池并行搜索，最后归约出全局最优
+def parallel_search(points, m, depot=depot, processes=None):
+    n = len(points)
+    if m > n:
+        raise ValueError(f"目标点数 {n} 少于无人机数 {m}，无法保证每架无人机至少一个目标")
+    processes = processes or os.cpu_count()
+    dist = build_distance_matrix(points, depot)
+    # 前缀数取进程数的若干倍，让先做完的进程继续领任务，负载更均衡
+    depth = 1
+    while depth < n and len(rgs_prefixes(depth, n, m)) < 8 * processes:
+        depth += 1
+    chunks = [(prefix, n, m) for prefix in rgs_prefixes(depth, n, m)]
+
+    shm = shared_memory.SharedMemory(create=True, size=dist.nbytes)
+    try:
+        np.ndarray(dist.shape, dtype=np.float64, buffer=shm.buf)[:] = dist
+        best_value = multiprocessing.Value("d", float("inf"))
+        with multiprocessing.Pool(
+            processes, initializer=_init_worker, initargs=(shm.name, dist.shape, best_value)
+        ) as pool:
+            best_total, best_group = float("inf"), None
+            for total, group in pool.imap_unordered(_search_chunk, chunks):
+                if group is not None and total < best_total:
+                    best_total, best_group = total, group
+    finally:
+        shm.close()
+        shm.unlink()
+    return best_total, best_group
 
 def indices_change(indices):
     return [f'T{i+1}' for i in indices]
 
-best_group_name = []
-for subgroup in best_group:
-    subgroup_names = indices_change(subgroup)
-    best_group_name.append(subgroup_names)
+if __name__ == "__main__":
+    min_total, best_group = solve(points, num_drones)
+
+    best_group_name = []
+    for subgroup in best_group:
+        subgroup_names = indices_change(subgroup)
+        best_group_name.append(subgroup_names)
+
+    print(f"无人机最小总飞行距离为 {min_total:.2f} 米")
+    print("对应分组方案为：")
+    for i, subgroup in enumerate(best_group_name, 1):
+        print(f"无人机{i}目标点：{','.join(subgroup)}")
+
+    # 分支定界求解，作为斯特林数枚举思路的对照
+    total, groups, gap, nodes = branch_and_bound(points, num_drones, time_limit=10)
+    print(f"分支定界：总飞行距离 {total:.2f} 米，搜索结点 {nodes} 个，最优性间隙 {gap:.2%}")
 
-print(f"无人机最小总飞行距离为 {min_total:.2f} 米")
-print("对应分组方案为：")
-for i, subgroup in enumerate(best_group_name, 1):
-    print(f"无人机{i}目标点：{','.join(subgroup)}")
\ No newline at end of file
+    # 多进程枚举全部划分
+    total, groups = parallel_search(points, num_drones)
+    print(f"多进程枚举：总飞行距离 {total:.2f} 米")
@@ -0,0 +1,179 @@
+import time
+import numpy as np
+
+# 先聚类后排路：TJH 思路在大规模目标上的近似版本
+# 每架无人机负责一个簇，簇内从基地出发走开放路径（不返航），与 T1_tjh.py 的口径一致
+
+depot = (0, 0)
+uav_speed = 50  # m/s
+max_flight_time = 600  # s
+
+# k-means++ 初始化簇中心
+def init_centers(coords, m, rng):
+    centers = [coords[rng.integers(len(coords))]]
+    closest = ((coords - centers[0]) ** 2).sum(axis=1)
+    for _ in range(1, m):
+        total = closest.sum()
+        # 点已经全部和中心重合（目标少于簇数或有重复点）时退化为均匀抽样
+        probs = closest / total if total > 0 else None
+        center = coords[rng.choice(len(coords), p=probs)]
+        centers.append(center)
+        closest = np.minimum(closest, ((coords - center) ** 2).sum(axis=1))
+    return np.array(centers)
+
+# 点到各簇中心的平方距离，用 |x|^2 - 2x·c + |c|^2 展开成一次矩阵乘法
+def squared_distances(coords, centers):
+    sq = (coords ** 2).sum(axis=1)[:, None] - 2 * coords @ centers.T + (centers ** 2).sum(axis=1)[None, :]
+    return np.maximum(sq, 0)
+
+# 平衡 k-means：每个簇有容量上限 capacities[c]
+# 分配时给每个簇加一个“价格”，超员的簇涨价、缺人的簇降价，全程对 n×m 矩阵向量化；
+# 最后把仍然超员的簇里“换簇代价”最小的点挪到有空位的簇，保证容量严格满足
+# 容量须为正且总和不小于点数，否则无法满足，抛出 ValueError
+def balanced_kmeans(coords, m, capacities, iters=30, seed=0):
+    capacities = np.asarray(capacities, dtype=float)
+    if (capacities < 1).any():
+        raise ValueError("每个簇的容量至少为 1")
+    if capacities.sum() < len(coords):
+        raise ValueError(f"簇容量之和 {capacities.sum():.0f} 小于目标数 {len(coords)}，无法分配")
+    rng = np.random.default_rng(seed)
+    centers = init_centers(coords, m, rng)
+    price = np.zeros(m)
+    for _ in range(iters):
+        sq = squared_distances(coords, centers)
+        scale = sq.mean()
+        labels = np.argmin(sq + price, axis=1)
+        counts = np.bincount(labels, minlength=m)
+        price += 0.5 * scale * (counts - capacities) / capacities
+        price = np.maximum(price, 0)
+        filled = counts > 0
+        sums = np.stack([np.bincount(labels, coords[:, 0], m), np.bincount(labels, coords[:, 1], m)], axis=1)
+        centers[filled] = sums[filled] / counts[filled, None]
+
+    sq = squared_distances(coords, centers)
+    labels = np.argmin(sq + price, axis=1)
+    counts = np.bincount(labels, minlength=m)
+    for c in np.nonzero(counts > capacities)[0]:
+        members = np.nonzero(labels == c)[0]
+        extra = sq[members] - sq[members, c][:, None]
+        extra[:, c] = np.inf
+        # 按换簇代价从小到大挪出多余的点
+        for p in members[np.argsort(extra.min(axis=1))]:
+            if counts[c] <= capacities[c]:
+                break
+            options = np.where(counts < capacities, sq[p], np.inf)
+            target = int(np.argmin(options))
+            labels[p] = target
+            counts[c] -= 1
+            counts[target] += 1
+    return labels, centers
+
+def path_length(coords, order, start=depot):
+    if len(order) == 0:
+        return 0.0
+    pts = np.vstack([start, coords[order]])
+    return float(np.sqrt(((pts[1:] - pts[:-1]) ** 2).sum(axis=1)).sum())
+
+# 簇内距离矩阵，下标0为基地，下标 i+1 为簇内第 i 个点
+def local_distance_matrix(coords, start=depot):
+    pts = np.vstack([start, coords])
+    sq = squared_distances(pts, pts)
+    return np.sqrt(sq)
+
+# 最近邻构造开放路径，每一步对剩余点向量化取最近
+def nearest_neighbor_path(dist):
+    n = len(dist) - 1
+    visited = np.zeros(n + 1, dtype=bool)
+    visited[0] = True
+    order = []
+    pos = 0
+    for _ in range(n):
+        d = np.where(visited, np.inf, dist[pos])
+        pos = int(np.argmin(d))
+        order.append(pos - 1)
+        visited[pos] = True
+    return np.array(order, dtype=np.int64)
+
+# 开放路径的 2-opt：每轮用矩阵一次算出所有翻转 [i, j] 的增量，
+# 再从好到坏挑出互不相邻的若干段同时翻转（互不相邻的翻转改动的边不重叠，增量可以直接相加）
+def two_opt_path(dist, order, max_rounds=100):
+    order = order.copy()
+    k = len(order)
+    if k < 3:
+        return order
+    upper = np.triu(np.ones((k, k), dtype=bool), 1)
+    for _ in range(max_rounds):
+        nodes = np.concatenate([[0], order + 1])
+        prev, first = nodes[:-1], nodes[1:]  # 翻转段前一个点 p[i-1]、段首 p[i]
+        nxt = np.append(nodes[2:], 0)  # 段尾后一个点 p[j+1]，最后一个点后面没有点
+        has_next = np.arange(k) < k - 1
+        old = dist[prev, first][:, None] + np.where(has_next, dist[first, nxt], 0)[None, :]
+        new = dist[prev[:, None], first[None, :]] + np.where(has_next[None, :], dist[first[:, None], nxt[None, :]], 0)
+        delta = np.where(upper, new - old, 0)
+        candidates = np.argwhere(delta < -1e-9)
+        if len(candidates) == 0:
+            break
+        candidates = candidates[np.argsort(delta[candidates[:, 0], candidates[:, 1]])]
+        taken = np.zeros(k + 1, dtype=bool)
+        for i, j in candidates[: 4 * k]:
+            if taken[max(i - 1, 0) : j + 2].any():
+                continue
+            taken[i : j + 1] = True
+            order[i : j + 1] = order[i : j + 1][::-1].copy()
+    return order
+
+# 先聚类后排路。先按目标数均分容量，若有簇的路径超出续航，就按超出比例收缩它的容量（至少留 1 个），
+# 收缩过的簇保留收缩后的容量，其余名额由从未收缩的簇均分，然后重新聚类，最多 rounds 轮
+# 没有簇可以接收多出的目标、或超出续航的簇已经无法再收缩时提前停止，返回的 feasible 为 False
+def cluster_first_route_second(coords, m, start=depot, max_distance=uav_speed * max_flight_time,
+                               rounds=5, seed=0):
+    coords = np.asarray(coords, dtype=float)
+    n = len(coords)
+    capacities = np.full(m, -(-n // m), dtype=float)
+    shrunk = np.zeros(m, dtype=bool)
+    for _ in range(rounds):
+        labels, _ = balanced_kmeans(coords, m, capacities, seed=seed)
+        routes = []
+        for c in range(m):
+            members = np.nonzero(labels == c)[0]
+            dist = local_distance_matrix(coords[members], start)
+            order = two_opt_path(dist, nearest_neighbor_path(dist))
+            route = members[order]
+            routes.append((route, path_length(coords, route, start)))
+        lengths = np.array([length for _, length in routes])
+        over = lengths > max_distance
+        if not over.any():
+            break
+        counts = np.bincount(labels, minlength=m)
+        reduced = np.maximum(np.floor(counts[over] * max_distance / lengths[over]), 1)
+        reduced = np.minimum(reduced, capacities[over])
+        if (reduced >= counts[over]).all():
+            # 超出续航的簇都只剩不能再少的目标，重新聚类也无济于事
+            break
+        capacities[over] = reduced
+        shrunk |= over
+        free = ~shrunk
+        if not free.any():
+            break
+        spare = n - capacities[shrunk].sum()
+        capacities[free] = max(np.ceil(spare / free.sum()), 1)
+    feasible = bool((lengths <= max_distance).all())
+    return routes, float(lengths.sum()), feasible
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(2025)
+    n, m = 5000, 50
+    coords = rng.uniform(0, 5000, size=(n, 2))
+
+    start_time = time.perf_counter()
+    routes, total, feasible = cluster_first_route_second(coords, m)
+    elapsed = time.perf_counter() - start_time
+
+    lengths = [length for _, length in routes]
+    print(f"{n} 个目标、{m} 架无人机，聚类+排路用时 {elapsed:.3f} 秒")
+    print(f"总飞行距离 {total:.1f} 米，最长单机路径 {max(lengths):.1f} 米")
+    print(f"每架无人机目标数：{min(len(r) for r, _ in routes)} ~ {max(len(r) for r, _ in routes)}")
+    if feasible:
+        print("所有无人机均满足续航约束")
+    else:
+        print(f"警告：有无人机超出续航（上限 {uav_speed * max_flight_time} 米）")
@@ -1,6 +1,14 @@
 import math
-from itertools import combinations
+import itertools
+import numpy as np
 import matplotlib.pyplot as plt
+from distance_matrix import build_distance_matrix
+from local_search import improve_routes
+from savings import knn_savings, merge_routes, spanning_savings
+from visibility import obstacle_distance_matrix
+from repo_modules import load, profiler
+
+cached_solve = load("plan_cache").cached_solve
 
 # 定义坐标点
 points = {
@@ -14,68 +22,43 @@ points = {
 
 # 计算两点之间的欧几里得距离
 def calculate_distance(p1, p2):
+    if profiler.enabled:
+        profiler.count("distance")
     return math.sqrt((p1[0]-p2[0])**2 + (p1[1]-p2[1])**2)
 
-# 构建距离矩阵
-def build_distance_matrix(points):
-    locations = list(points.keys())
-    n = len(locations)
-    distance_matrix = [[0]*n for _ in range(n)]
-    
-    for i in range(n):
-        for j in range(n):
-            if i != j:
-                distance_matrix[i][j] = calculate_distance(
-                    points[locations[i]], 
-                    points[locations[j]]
-                )
-    return distance_matrix, locations
-
 # 节约算法实现
-def clarke_wright_savings(points, num_vehicles):
-    # 构建距离矩阵和位置列表
-    distance_matrix, locations = build_distance_matrix(points)
-    depot_index = locations.index('depot')
-    
-    # 初始化路线：每个目标点作为一个单独的路线
-    routes = []
-    for loc in locations:
-        if loc != 'depot':
-            routes.append([depot_index, locations.index(loc), depot_index])
-    
-    # 计算所有节约值
-    savings = []
-    for i, j in combinations([idx for idx in range(len(locations)) if idx != depot_index], 2):
-        saving = distance_matrix[depot_index][i] + distance_matrix[depot_index][j] - distance_matrix[i][j]
-        savings.append((saving, i, j))
-    
-    # 按节约值从大到小排序
-    savings.sort(reverse=True, key=lambda x: x[0])
-    
-    # 合并路线
-    for saving, i, j in savings:
-        # 找到包含i和j的路线
-        route_i = None
-        route_j = None
-        for route in routes:
-            if i in route and j not in route and route.index(i) != 0 and route.index(i) != len(route)-1:
-                route_i = route
-            if j in route and i not in route and route.index(j) != 0 and route.index(j) != len(route)-1:
-                route_j = route
-        
-        # 如果两条路线可以合并
-        if route_i is not None and route_j is not None and len(routes) > num_vehicles:
-            # 合并路线
-            new_route = []
-            if route_i[-1] == depot_index and route_j[0] == depot_index:
-                new_route = route_i[:-1] + route_j[1:]
-            elif route_i[0] == depot_index and route_j[-1] == depot_index:
-                new_route = route_j[:-1] + route_i[1:]
-            
-            if new_route:
-                routes.remove(route_i)
-                routes.remove(route_j)
-                routes.append(new_route)
+# neighbors 为 None 时用全部点对的节约值；给定 k 时进入稀疏模式，只用每个目标的 k 个最近邻，
+# 不构建 n×n 距离矩阵，适合两万以上目标点
+# improve=True 时在节约算法的结果上再跑一遍局部搜索（需要距离矩阵，只在全量模式下生效）
+# obstacles 为圆形障碍物列表 [(x, y, radius), ...]，给定时距离取绕开障碍物的最短路长度（只在全量模式下生效）
+def clarke_wright_savings(points, num_vehicles, neighbors=None, improve=False, obstacles=None):
+    if neighbors is None:
+        # 构建距离矩阵和位置列表
+        with profiler.phase("distance_matrix"):
+            if obstacles:
+                distance_matrix, locations = obstacle_distance_matrix(points, obstacles)
+            else:
+                distance_matrix, locations = build_distance_matrix(points)
+        if profiler.enabled:
+            profiler.count("distance.matrix_entries", len(locations) ** 2)
+        depot_index = locations.index('depot')
+        # 每个目标点先单独成一条路线，再按节约值从大到小合并
+        with profiler.phase("savings"):
+            routes = merge_routes(len(locations), depot_index, num_vehicles,
+                                  spanning_savings(distance_matrix, depot_index))
+        if improve:
+            with profiler.phase("local_search"):
+                routes, moves = improve_routes(routes, distance_matrix)
+            if profiler.enabled:
+                for name, count in moves.items():
+                    profiler.count(f"local_search.{name}", count)
+    else:
+        locations = list(points.keys())
+        depot_index = locations.index('depot')
+        coords = np.array(list(points.values()), dtype=float)
+        with profiler.phase("savings"):
+            routes = merge_routes(len(locations), depot_index, num_vehicles,
+                                  knn_savings(coords, depot_index, neighbors), coords=coords)
     
     # 计算每条路线的总距离
     route_details = []
@@ -83,7 +66,10 @@ def clarke_wright_savings(points, num_vehicles):
     for route in routes:
         route_distance = 0
         for i in range(len(route)-1):
-            route_distance += distance_matrix[route[i]][route[i+1]]
+            if neighbors is None:
+                route_distance += float(distance_matrix[route[i]][route[i+1]])
+            else:
+                route_distance += calculate_distance(points[locations[route[i]]], points[locations[route[i+1]]])
         total_distance += route_distance
         
         # 转换为目标点名称
@@ -96,6 +82,102 @@ def clarke_wright_savings(points, num_vehicles):
     
     return route_details, total_distance
 
+# 扇区内的访问顺序：按半径等分成若干环，环内按极角排序、相邻环方向交替（蛇形），
+# 环数取 sqrt(k·径向跨度/弧长)，使环内点距与环间距大致相当
+def sector_order(radius, angle):
+    k = len(radius)
+    if k <= 2:
+        return np.argsort(angle, kind='stable')
+    radial = radius.max() - radius.min()
+    arc = (angle.max() - angle.min()) * radius.mean()
+    rings = int(np.clip(round(math.sqrt(k * radial / max(arc, 1e-9))), 1, k))
+    by_radius = np.argsort(radius, kind='stable')
+    order = []
+    for r, ring in enumerate(np.array_split(by_radius, rings)):
+        ring = ring[np.argsort(angle[ring], kind='stable')]
+        order.append(ring if r % 2 == 0 else ring[::-1])
+    return np.concatenate(order)
+
+# 闭合路线长度：基地 → coords[order] → 基地
+def closed_length(coords, order, depot):
+    pts = np.vstack([depot, coords[order], depot])
+    return float(np.sqrt(((pts[1:] - pts[:-1]) ** 2).sum(axis=1)).sum())
+
+# 极角扫描构造：所有目标按绕基地的极角排序，从最大的角度空隙处起扫，按目标数均分成 num_vehicles 个扇区；
+# 给定 max_distance（续航对应的航程）时，超出航程的扇区再按极角对半切开，直到每条路线都满足为止。
+# 只有排序和对半切分，总复杂度 O(n log n)，不需要距离矩阵，可作为十万级目标的初始解。
+# 返回格式与 clarke_wright_savings 相同；扇区切分后路线数可能多于 num_vehicles
+def sweep_routes(points, num_vehicles, max_distance=None):
+    names = [name for name in points if name != 'depot']
+    if not names:
+        return [], 0
+    depot = np.array(points['depot'], dtype=float)
+    coords = np.array([points[name] for name in names], dtype=float)
+    offset = coords - depot
+    radius = np.hypot(offset[:, 0], offset[:, 1])
+    angle = np.arctan2(offset[:, 1], offset[:, 0])
+    by_angle = np.argsort(angle, kind='stable')
+    sorted_angle = angle[by_angle]
+    gaps = np.diff(np.append(sorted_angle, sorted_angle[0] + 2 * math.pi))
+    start = (int(np.argmax(gaps)) + 1) % len(names)
+    by_angle = np.roll(by_angle, -start)
+    # 起扫后极角连续递增，方便按极角排序和计算弧长
+    unwrapped = np.unwrap(angle[by_angle])
+
+    routes = []
+    pending = list(np.array_split(np.arange(len(names)), min(num_vehicles, len(names))))
+    while pending:
+        sector = pending.pop()
+        members = by_angle[sector]
+        order = members[sector_order(radius[members], unwrapped[sector])]
+        length = closed_length(coords, order, depot)
+        if max_distance is not None and length > max_distance and len(sector) > 1:
+            half = len(sector) // 2
+            pending += [sector[half:], sector[:half]]
+            continue
+        routes.append((sector[0], order, length))
+    routes.sort(key=lambda route: route[0])
+
+    route_details = []
+    total_distance = 0
+    for _, order, length in routes:
+        covered = [names[idx] for idx in order]
+        route_details.append({
+            'path': ['depot'] + covered + ['depot'],
+            'distance': length,
+            'covered': covered
+        })
+        total_distance += length
+    return route_details, total_distance
+
+# 最简的极角扫描：按绕基地的极角排序后均分成 num_vehicles 段，不分环、不检查航程，
+# 只有一次排序和向量化的路线长度计算，作为时间极紧时的保底方案；返回格式与 sweep_routes 相同
+def polar_routes(points, num_vehicles):
+    keys = list(points)
+    if len(keys) <= 1:
+        return [], 0
+    # 坐标按字典顺序一次性平铺读入，比逐个取再建嵌套列表快得多；再去掉基地那一行
+    coords = np.fromiter(itertools.chain.from_iterable(points.values()), dtype=float,
+                         count=2 * len(keys)).reshape(-1, 2)
+    depot_index = keys.index('depot')
+    depot = coords[depot_index].copy()
+    names = np.array(keys[:depot_index] + keys[depot_index + 1:], dtype=object)
+    coords = np.delete(coords, depot_index, axis=0)
+    offset = coords - depot
+    order = np.argsort(np.arctan2(offset[:, 1], offset[:, 0]))
+    route_details = []
+    total_distance = 0
+    for sector in np.array_split(order, min(num_vehicles, len(names))):
+        length = closed_length(coords, sector, depot)
+        covered = names[sector].tolist()
+        route_details.append({
+            'path': ['depot'] + covered + ['depot'],
+            'distance': length,
+            'covered': covered
+        })
+        total_distance += length
+    return route_details, total_distance
+
 # 可视化结果
 def plot_routes(points, routes):
     plt.figure(figsize=(10, 8))
@@ -129,8 +211,9 @@ def plot_routes(points, routes):
 if __name__ == "__main__":
     num_uavs = 3
     
-    # 使用节约算法求解
-    routes, total_distance = clarke_wright_savings(points, num_uavs)
+    # 使用节约算法求解，同一实例的结果直接从磁盘缓存读取
+    routes, total_distance = cached_solve("VRP.T1.clarke_wright_savings/v1", (points, num_uavs),
+                                          lambda: clarke_wright_savings(points, num_uavs))
     
     # 打印结果
     print("Optimal UAV Path Assignment:")
@@ -1,10 +1,13 @@
 import math
 import heapq
-from itertools import combinations
+import warnings
+from bisect import bisect_right
 import matplotlib.pyplot as plt
 from matplotlib.patches import Circle
 import numpy as np
-from copy import deepcopy
+from distance_matrix import build_distance_matrix
+from savings import iter_savings, merge_routes, spanning_savings
+from repo_modules import profiler
 
 # Define coordinates
 points = {
@@ -21,66 +24,46 @@ uav_speed = 50  # m/s
 min_separation = 50  # m
 max_communication = 1000  # m
 max_flight_time = 600  # s
+max_payload = None  # payload units per UAV, None = unlimited
 
 # Calculate Euclidean distance between two points
 def calculate_distance(p1, p2):
     return math.sqrt((p1[0]-p2[0])**2 + (p1[1]-p2[1])**2)
 
-# Build distance matrix
-def build_distance_matrix(points):
-    locations = list(points.keys())
-    n = len(locations)
-    distance_matrix = [[0]*n for _ in range(n)]
-    
-    for i in range(n):
-        for j in range(n):
-            if i != j:
-                distance_matrix[i][j] = calculate_distance(
-                    points[locations[i]], 
-                    points[locations[j]]
-                )
-    return distance_matrix, locations
-
 # Clarke-Wright Savings algorithm implementation
-def clarke_wright_savings(points, num_uavs):
+# Merges that would exceed the flight-time (endurance) or payload limit are rejected during
+# construction. demands maps target name -> payload units (default 1 per target).
+# If the limits cannot be met (more routes than UAVs, or a single target out of reach) the best
+# effort routes are still returned and a RuntimeWarning is issued.
+def clarke_wright_savings(points, num_uavs, demands=None, payload=max_payload):
     distance_matrix, locations = build_distance_matrix(points)
     depot_index = locations.index('depot')
+    max_length = uav_speed * max_flight_time
+    demand = [0 if loc == 'depot' else (1 if demands is None else demands[loc]) for loc in locations]
     
-    # Initialize routes
-    routes = []
-    for loc in locations:
-        if loc != 'depot':
-            routes.append([depot_index, locations.index(loc), depot_index])
+    # Start with one route per target, then merge by descending savings
+    routes = merge_routes(len(locations), depot_index, num_uavs,
+                          spanning_savings(distance_matrix, depot_index))
     
-    # Calculate savings
-    savings = []
-    for i, j in combinations([idx for idx in range(len(locations)) if idx != depot_index], 2):
-        saving = distance_matrix[depot_index][i] + distance_matrix[depot_index][j] - distance_matrix[i][j]
-        savings.append((saving, i, j))
+    # Routes only grow when merged, so if every final route is within the limits no merge was
+    # ever rejected and the unconstrained result stands. Otherwise redo the merge with the
+    # limits enforced, over the fully sorted savings list.
+    def within_limits(route):
+        length = sum(distance_matrix[route[k]][route[k+1]] for k in range(len(route)-1))
+        load = sum(demand[idx] for idx in route)
+        return length <= max_length and (payload is None or load <= payload)
     
-    savings.sort(reverse=True, key=lambda x: x[0])
-    
-    # Merge routes
-    for saving, i, j in savings:
-        route_i = None
-        route_j = None
-        for route in routes:
-            if i in route and j not in route and route.index(i) != 0 and route.index(i) != len(route)-1:
-                route_i = route
-            if j in route and i not in route and route.index(j) != 0 and route.index(j) != len(route)-1:
-                route_j = route
-        
-        if route_i is not None and route_j is not None and len(routes) > num_uavs:
-            new_route = []
-            if route_i[-1] == depot_index and route_j[0] == depot_index:
-                new_route = route_i[:-1] + route_j[1:]
-            elif route_i[0] == depot_index and route_j[-1] == depot_index:
-                new_route = route_j[:-1] + route_i[1:]
-            
-            if new_route:
-                routes.remove(route_i)
-                routes.remove(route_j)
-                routes.append(new_route)
+    if not all(within_limits(route) for route in routes):
+        routes = merge_routes(len(locations), depot_index, num_uavs,
+                              iter_savings(distance_matrix, depot_index),
+                              max_length=max_length, capacity=payload, demands=demand,
+                              distance_matrix=distance_matrix)
+        if len(routes) > num_uavs:
+            warnings.warn(f"flight-time/payload limits need {len(routes)} routes, only {num_uavs} UAVs available",
+                          RuntimeWarning, stacklevel=2)
+        if not all(within_limits(route) for route in routes):
+            warnings.warn("some single targets are beyond the flight-time/payload limits",
+                          RuntimeWarning, stacklevel=2)
     
     # Convert to route details
     route_details = []
@@ -88,7 +71,7 @@ def clarke_wright_savings(points, num_uavs):
     for route in routes:
         route_distance = 0
         for k in range(len(route)-1):
-            route_distance += distance_matrix[route[k]][route[k+1]]
+            route_distance += float(distance_matrix[route[k]][route[k+1]])
         total_distance += route_distance
         
         route_names = [locations[idx] for idx in route]
@@ -101,97 +84,383 @@ def clarke_wright_savings(points, num_uavs):
     
     return route_details, total_distance
 
+# Piecewise-linear UAV trajectory with precomputed cumulative leg times.
+# Single queries are a bisect over the waypoint times; before takeoff and after the last
+# waypoint the UAV stays put. An optional route['delay'] postpones takeoff and
+# route['speed_factors'] scales the cruise speed of each leg (1.0 = full speed).
+class Trajectory:
+    def __init__(self, route, points, speed=uav_speed):
+        self.coords = [points[name] for name in route['path']]
+        factors = route.get('speed_factors') or [1.0] * (len(self.coords) - 1)
+        self.takeoff = float(route.get('delay', 0.0))
+        self.times = [self.takeoff]
+        self.length = 0.0
+        for k in range(len(self.coords)-1):
+            leg = calculate_distance(self.coords[k], self.coords[k+1])
+            self.length += leg
+            self.times.append(self.times[-1] + leg / (speed * factors[k]))
+        self.end_time = self.times[-1]
+        self.box = waypoint_box(self.coords)
+    
+    def position(self, t):
+        k = bisect_right(self.times, t) - 1
+        if k >= len(self.times) - 1:
+            return self.coords[-1]
+        if k < 0:
+            return self.coords[0]
+        (x1, y1), (x2, y2) = self.coords[k], self.coords[k+1]
+        ratio = (t - self.times[k]) / (self.times[k+1] - self.times[k])
+        return (x1 + ratio * (x2 - x1), y1 + ratio * (y2 - y1))
+    
+    # Positions at an array of times, shape (len(times), 2)
+    def positions(self, times):
+        return trajectory_positions([self], times)[0]
+
+# Positions of all UAVs at all sample times as one array of shape (num_uavs, len(times), 2).
+# The waypoint times of every UAV are laid end to end with a per-UAV offset larger than any
+# query time, so a single searchsorted locates the leg for every (UAV, time) pair at once;
+# the position is then the leg start plus elapsed time times the leg velocity.
+def trajectory_positions(trajectories, times):
+    times = np.clip(np.asarray(times, dtype=float), 0.0, None)
+    span = max(float(times.max(initial=0.0)), max(traj.end_time for traj in trajectories)) + 1.0
+    offsets = np.arange(len(trajectories)) * span
+    takeoff = np.array([traj.takeoff for traj in trajectories])
+    flat_times = np.concatenate([traj.times for traj in trajectories])
+    coords = np.concatenate([np.asarray(traj.coords, dtype=float) for traj in trajectories])
+    keys = flat_times + np.repeat(offsets, [len(traj.times) for traj in trajectories])
+    # velocity of the leg starting at each waypoint; zero at the last waypoint of every UAV
+    leg = np.diff(flat_times, append=0.0)
+    step = np.diff(coords, axis=0, append=coords[-1:])
+    moving = leg > 0
+    velocity = np.zeros_like(coords)
+    velocity[moving] = step[moving] / leg[moving, None]
+    
+    # a UAV waiting for takeoff is held at its first waypoint
+    query = np.maximum(times[None, :], takeoff[:, None])
+    k = np.searchsorted(keys, query + offsets[:, None], side='right') - 1
+    elapsed = query - flat_times[k]
+    result = np.empty(k.shape + (2,))
+    result[..., 0] = coords[:, 0][k] + elapsed * velocity[:, 0][k]
+    result[..., 1] = coords[:, 1][k] + elapsed * velocity[:, 1][k]
+    return result
+
+# Bounding box of a trajectory, used to skip UAV pairs that can never conflict
+def waypoint_box(coords):
+    xs = [c[0] for c in coords]
+    ys = [c[1] for c in coords]
+    return min(xs), min(ys), max(xs), max(ys)
+
+# First violation between two piecewise-linear trajectories within [start_time, end_time].
+# The waypoint times of both UAVs are swept together; on each common interval both move in
+# straight lines, so the squared distance is a quadratic a*s^2 + 2*b*s + c in local time s
+# and its crossings of 50 m / 1 km come from the quadratic formula.
+# Returns (first_time, kind, worst_time, worst_distance) or None; intervals starting
+# at or after `stop` are not examined.
+def first_pair_violation(traj_a, traj_b, end_time, check_min=True, check_max=True, stop=math.inf,
+                         start_time=0.0):
+    ta, pa, tb, pb = traj_a.times, traj_a.coords, traj_b.times, traj_b.coords
+    lo, hi = min_separation ** 2, max_communication ** 2
+    cuts = sorted({t for t in ta + tb if start_time < t < end_time} | {start_time, end_time})
+    ia = ib = 0
+    
+    def state(times, coords, k, t):
+        # position at t and velocity on leg k (zero before takeoff and once the route is finished)
+        if t < times[0]:
+            return coords[0], (0.0, 0.0)
+        if k >= len(times) - 1:
+            return coords[-1], (0.0, 0.0)
+        p1, p2 = coords[k], coords[k+1]
+        span = times[k+1] - times[k]
+        r = (t - times[k]) / span
+        vx, vy = (p2[0] - p1[0]) / span, (p2[1] - p1[1]) / span
+        return (p1[0] + r * (p2[0] - p1[0]), p1[1] + r * (p2[1] - p1[1])), (vx, vy)
+    
+    for n in range(len(cuts)):
+        start = cuts[n]
+        if start >= stop:
+            break
+        length = cuts[n+1] - start if n + 1 < len(cuts) else 0.0
+        while ia < len(ta) - 1 and ta[ia+1] <= start:
+            ia += 1
+        while ib < len(tb) - 1 and tb[ib+1] <= start:
+            ib += 1
+        (ax, ay), (avx, avy) = state(ta, pa, ia, start)
+        (bx, by), (bvx, bvy) = state(tb, pb, ib, start)
+        px, py, vx, vy = ax - bx, ay - by, avx - bvx, avy - bvy
+        a = vx * vx + vy * vy
+        b = px * vx + py * vy
+        c = px * px + py * py
+        found = []
+        if check_min:
+            if c < lo:
+                s = min(max(-b / a, 0.0), length) if a > 0 else 0.0
+                found.append((start, 'min', start + s, math.sqrt(max(a * s * s + 2 * b * s + c, 0.0))))
+            else:
+                disc = b * b - a * (c - lo)
+                if a > 0 and disc > 0:
+                    s1 = (-b - math.sqrt(disc)) / a
+                    if 0 <= s1 < length:
+                        s = min(-b / a, length)
+                        found.append((start + s1, 'min', start + s, math.sqrt(max(a * s * s + 2 * b * s + c, 0.0))))
+        if check_max:
+            end_value = a * length * length + 2 * b * length + c
+            if c > hi:
+                worst = length if end_value > c else 0.0
+                found.append((start, 'max', start + worst, math.sqrt(max(end_value, c))))
+            elif end_value > hi:
+                s2 = (-b + math.sqrt(max(b * b - a * (c - hi), 0.0))) / a
+                found.append((start + s2, 'max', start + length, math.sqrt(end_value)))
+        if found:
+            return min(found)
+    return None
+
+# First violation between two UAVs, or None. Pairs whose bounding boxes are too far apart to
+# get within 50 m and too close together to exceed 1 km are skipped without a sweep.
+# Once both UAVs have finished they hover, so checking up to the later finish is enough.
+# With airborne=True a UAV only counts between takeoff and landing (it is on the ground at the
+# depot otherwise), so only the overlap of the two flight windows is checked.
+def pair_conflict(traj_a, traj_b, end_time=None, stop=math.inf, airborne=False):
+    if profiler.enabled:
+        profiler.count("separation.pair_checks")
+    (ax0, ay0, ax1, ay1), (bx0, by0, bx1, by1) = traj_a.box, traj_b.box
+    # closest and farthest any two points of the two boxes can be
+    gap = math.hypot(max(bx0 - ax1, ax0 - bx1, 0), max(by0 - ay1, ay0 - by1, 0))
+    spread = math.hypot(max(ax1, bx1) - min(ax0, bx0), max(ay1, by1) - min(ay0, by0))
+    check_min = gap < min_separation
+    check_max = spread > max_communication
+    if not (check_min or check_max):
+        return None
+    if profiler.enabled:
+        profiler.count("separation.pair_sweeps")
+    start_time = 0.0
+    if airborne:
+        start_time = max(traj_a.takeoff, traj_b.takeoff)
+        end_time = min(traj_a.end_time, traj_b.end_time)
+        if start_time > end_time:
+            return None
+    elif end_time is None:
+        end_time = max(traj_a.end_time, traj_b.end_time)
+    return first_pair_violation(traj_a, traj_b, end_time, check_min, check_max, stop, start_time)
+
+# Exact continuous-time separation check: returns (valid, message) like the sampled check,
+# reporting when the first violation starts and the worst distance reached on that stretch
+def check_separation_exact(routes, points, airborne=False):
+    trajectories = [Trajectory(route, points) for route in routes]
+    end_time = max(traj.end_time for traj in trajectories)
+    best = None
+    for i in range(len(routes)):
+        for j in range(i+1, len(routes)):
+            found = pair_conflict(trajectories[i], trajectories[j], end_time,
+                                  stop=math.inf if best is None else best[0][0], airborne=airborne)
+            if found is not None and (best is None or found[0] < best[0][0]):
+                best = (found, i, j)
+    
+    if best is None:
+        return True, "All separation constraints satisfied"
+    (t, kind, worst_t, dist), i, j = best
+    limit = f"< {min_separation}m" if kind == 'min' else f"> {max_communication}m"
+    if worst_t == t:
+        return False, f"UAV {i+1} and {j+1} at {t:.1f}s distance {dist:.1f}m {limit}"
+    return False, f"UAV {i+1} and {j+1} from {t:.3f}s, distance {dist:.1f}m at {worst_t:.3f}s {limit}"
+
 # Check UAV separation constraints
-def check_separation_constraints(routes, points, time_step=1):
-    max_time = max(route['time'] for route in routes)
+# time_step=None uses the exact analytic check; a number samples every time_step seconds.
+# airborne=True ignores UAVs that have not taken off yet or have already landed.
+def check_separation_constraints(routes, points, time_step=None, airborne=False):
+    if time_step is None:
+        return check_separation_exact(routes, points, airborne)
+    trajectories = [Trajectory(route, points) for route in routes]
+    max_time = max(traj.end_time for traj in trajectories)
     time_points = np.arange(0, max_time + time_step, time_step)
+    positions = trajectory_positions(trajectories, time_points)
+    flying = np.array([(time_points >= traj.takeoff) & (time_points <= traj.end_time)
+                       for traj in trajectories])
     
-    for t in time_points:
-        positions = []
-        for route in routes:
-            pos = get_position_at_time(route, t)
-            positions.append(pos)
-        
-        # Check all UAV pairs
-        for i in range(len(positions)):
-            for j in range(i+1, len(positions)):
-                dist = calculate_distance(positions[i], positions[j])
-                if dist < min_separation:
-                    return False, f"UAV {i+1} and {j+1} at {t:.1f}s distance {dist:.1f}m < {min_separation}m"
-                if dist > max_communication:
-                    return False, f"UAV {i+1} and {j+1} at {t:.1f}s distance {dist:.1f}m > {max_communication}m"
+    # Walk the samples in chunks; within a chunk all UAV pairs are checked at once and the
+    # earliest sample (then lowest pair) with a violation is reported
+    pairs_i, pairs_j = np.triu_indices(len(routes), 1)
+    chunk = max(1, 2000000 // max(len(pairs_i), 1))
+    for start in range(0, len(time_points), chunk):
+        diff = positions[pairs_i, start:start+chunk] - positions[pairs_j, start:start+chunk]
+        dist = np.hypot(diff[..., 0], diff[..., 1])
+        bad = (dist < min_separation) | (dist > max_communication)
+        if airborne:
+            bad &= flying[pairs_i, start:start+chunk] & flying[pairs_j, start:start+chunk]
+        if bad.any():
+            p, t = np.nonzero(bad.T)[::-1]
+            p, t = p[0], t[0]
+            i, j, d = pairs_i[p], pairs_j[p], dist[p, t]
+            limit = f"< {min_separation}m" if d < min_separation else f"> {max_communication}m"
+            return False, f"UAV {i+1} and {j+1} at {time_points[start + t]:.1f}s distance {d:.1f}m {limit}"
     
     return True, "All separation constraints satisfied"
 
 # Get UAV position at a specific time
 def get_position_at_time(route, query_time):
-    path = route['path']
-    distance = route['distance']
-    total_time = route['time']
-    
-    if query_time >= total_time:
-        return points[path[-1]]
-    
-    elapsed_time = 0
-    for i in range(len(path)-1):
-        p1 = points[path[i]]
-        p2 = points[path[i+1]]
-        segment_dist = calculate_distance(p1, p2)
-        segment_time = segment_dist / uav_speed
-        
-        if elapsed_time + segment_time >= query_time:
-            ratio = (query_time - elapsed_time) / segment_time
-            x = p1[0] + ratio * (p2[0] - p1[0])
-            y = p1[1] + ratio * (p2[1] - p1[1])
-            return (x, y)
-        
-        elapsed_time += segment_time
-    
-    return points[path[-1]]
+    return Trajectory(route, points).position(query_time)
 
 # Adjust routes to satisfy constraints
+# Simple adjustment strategy: swap one target between two UAVs until every pair is conflict-free.
+# Swaps are applied and undone in place; a trial only rebuilds the two changed trajectories and
+# rechecks the pairs involving them, since every other pair keeps its cached verdict. A UAV pair
+# (i, j) is skipped outright when some conflicting pair involves neither i nor j. Pair verdicts
+# are cached by path, takeoff delay and leg speed factors (everything that shapes a trajectory),
+# so repeated trials of the same pair of flights are not re-swept.
 def adjust_routes(routes, points):
-    # Simple adjustment strategy: swap targets to make UAVs closer
-    improved = True
-    while improved:
-        improved = False
-        for i in range(len(routes)):
-            for j in range(i+1, len(routes)):
-                # Try swapping targets
-                for k in range(1, len(routes[i]['path'])-1):
-                    for l in range(1, len(routes[j]['path'])-1):
-                        new_route_i = deepcopy(routes[i])
-                        new_route_j = deepcopy(routes[j])
-                        
-                        # Swap targets
-                        new_route_i['path'][k], new_route_j['path'][l] = new_route_j['path'][l], new_route_i['path'][k]
-                        
-                        # Recalculate distance and time
-                        new_route_i['distance'] = calculate_path_distance(new_route_i['path'])
-                        new_route_i['time'] = new_route_i['distance'] / uav_speed
-                        new_route_j['distance'] = calculate_path_distance(new_route_j['path'])
-                        new_route_j['time'] = new_route_j['distance'] / uav_speed
-                        
-                        # Check constraints
-                        if (new_route_i['time'] <= max_flight_time and 
-                            new_route_j['time'] <= max_flight_time):
-                            new_routes = deepcopy(routes)
-                            new_routes[i] = new_route_i
-                            new_routes[j] = new_route_j
-                            valid, _ = check_separation_constraints(new_routes, points)
-                            if valid:
-                                routes = new_routes
-                                improved = True
-                                break
-                    if improved:
-                        break
-                if improved:
-                    break
-            if improved:
-                break
+    routes = [dict(route, path=list(route['path'])) for route in routes]
+    trajectories = [Trajectory(route, points) for route in routes]
+    verdicts = {}
+    
+    def flight_key(route):
+        return (tuple(route['path']), float(route.get('delay', 0.0)),
+                tuple(route.get('speed_factors') or ()))
+    
+    def leg_time(r, leg, start, end):
+        factors = routes[r].get('speed_factors')
+        speed = uav_speed * (factors[leg] if factors else 1.0)
+        return calculate_distance(points[start], points[end]) / speed
+    
+    def conflict_free(a, b, traj_a, traj_b):
+        key = (flight_key(routes[a]), flight_key(routes[b]))
+        if key not in verdicts:
+            verdicts[key] = pair_conflict(traj_a, traj_b) is None
+        return verdicts[key]
+    
+    n = len(routes)
+    bad = {(a, b) for a in range(n) for b in range(a+1, n)
+           if not conflict_free(a, b, trajectories[a], trajectories[b])}
+    if not bad:
+        return routes
+    
+    for i in range(n):
+        for j in range(i+1, n):
+            if any(i not in pair and j not in pair for pair in bad):
+                continue
+            path_i, path_j = routes[i]['path'], routes[j]['path']
+            for k in range(1, len(path_i)-1):
+                for l in range(1, len(path_j)-1):
+                    old_i, old_j = path_i[k], path_j[l]
+                    # Endurance check from the four changed legs before building anything;
+                    # each leg is flown at its own speed factor (legs keep their factors when swapped)
+                    time_i = routes[i]['time'] + (
+                        leg_time(i, k-1, path_i[k-1], old_j) + leg_time(i, k, old_j, path_i[k+1])
+                        - leg_time(i, k-1, path_i[k-1], old_i) - leg_time(i, k, old_i, path_i[k+1]))
+                    time_j = routes[j]['time'] + (
+                        leg_time(j, l-1, path_j[l-1], old_i) + leg_time(j, l, old_i, path_j[l+1])
+                        - leg_time(j, l-1, path_j[l-1], old_j) - leg_time(j, l, old_j, path_j[l+1]))
+                    if time_i > max_flight_time or time_j > max_flight_time:
+                        continue
+                    
+                    path_i[k], path_j[l] = old_j, old_i
+                    trial_i = Trajectory(routes[i], points)
+                    trial_j = Trajectory(routes[j], points)
+                    trial = {i: trial_i, j: trial_j}
+                    valid = conflict_free(i, j, trial_i, trial_j) and all(
+                        conflict_free(min(a, c), max(a, c),
+                                      trial.get(min(a, c), trajectories[min(a, c)]),
+                                      trial.get(max(a, c), trajectories[max(a, c)]))
+                        for a in (i, j) for c in range(n) if c != i and c != j)
+                    if valid:
+                        for idx, traj in trial.items():
+                            routes[idx]['distance'] = traj.length
+                            routes[idx]['time'] = traj.end_time - traj.takeoff
+                            routes[idx]['covered'] = [loc for loc in routes[idx]['path'] if loc != 'depot']
+                        return routes
+                    path_i[k], path_j[l] = old_i, old_j
     
     return routes
 
+# Timing-based deconfliction: every path stays as it is, each UAV gets a takeoff delay and
+# per-leg speed factors instead (a factor of 1.0 is the full 50 m/s).
+# UAVs are scheduled one at a time, longest flight first. A flight is cut into short pieces,
+# each with a time window and a bounding box. If a piece of the new UAV has a box within 50 m
+# of a box of an already scheduled UAV, the two time windows must not overlap, which rules
+# out one interval of takeoff delays. The earliest delay outside all ruled-out intervals is
+# confirmed with the exact pair check (which also covers the 1 km limit).
+# Each uniform slow-down in speed_options is tried and the earliest landing wins; legs that
+# can then go back to full speed without a conflict are restored.
+# If no delay clears every scheduled UAV, the candidate delay conflicting with the fewest of
+# them is kept, and options that exceed the endurance limit are only used when all do; the
+# caller should re-run check_separation_constraints on the result.
+def deconflict_timing(routes, points, speed_options=(1.0, 0.75, 0.5), piece_length=100.0):
+    def pieces(route, factors):
+        # time windows (relative to takeoff) and bounding boxes of the flight pieces
+        coords = [points[name] for name in route['path']]
+        rows, t = [], 0.0
+        for k in range(len(coords)-1):
+            (x1, y1), (x2, y2) = coords[k], coords[k+1]
+            leg = calculate_distance(coords[k], coords[k+1])
+            count = max(1, math.ceil(leg / piece_length))
+            step = leg / (uav_speed * factors[k]) / count
+            for c in range(count):
+                r0, r1 = c / count, (c + 1) / count
+                xa, xb = x1 + r0 * (x2 - x1), x1 + r1 * (x2 - x1)
+                ya, yb = y1 + r0 * (y2 - y1), y1 + r1 * (y2 - y1)
+                rows.append((t, t + step, min(xa, xb), min(ya, yb), max(xa, xb), max(ya, yb)))
+                t += step
+        return np.array(rows).reshape(-1, 6)
+    
+    def conflicts(candidate, placed):
+        # number of scheduled UAVs the candidate conflicts with
+        traj = Trajectory(candidate, points)
+        return sum(pair_conflict(traj, other, airborne=True) is not None for other in placed)
+    
+    order = sorted(range(len(routes)), key=lambda idx: -routes[idx]['time'])
+    timed = [None] * len(routes)
+    placed, placed_pieces = [], np.empty((0, 6))
+    for idx in order:
+        route = routes[idx]
+        legs = len(route['path']) - 1
+        best = None
+        for option, factor in enumerate(speed_options):
+            factors = [factor] * legs
+            own = pieces(route, factors)
+            too_long = bool(len(own)) and own[-1, 1] > max_flight_time
+            # ruled-out delays: d in [t0 - s1, t1 - s0] for every pair of close pieces
+            a, b = own[:, None, :], placed_pieces[None, :, :]
+            gap = np.hypot(np.maximum(np.maximum(b[..., 2] - a[..., 4], a[..., 2] - b[..., 4]), 0),
+                           np.maximum(np.maximum(b[..., 3] - a[..., 5], a[..., 3] - b[..., 5]), 0))
+            close = gap < min_separation
+            lows = (b[..., 0] - a[..., 1])[close]
+            highs = (b[..., 1] - a[..., 0])[close]
+            # free delays in increasing order: 0 if allowed, then just past each block of intervals
+            candidates, delay = [], 0.0
+            for low, high in sorted(zip(lows.tolist(), highs.tolist())):
+                if high < delay:
+                    continue
+                if low > delay:
+                    candidates.append(delay)
+                delay = max(delay, high + 1e-6)
+            candidates.append(delay)
+            fewest = None
+            for d in candidates:
+                count = conflicts(dict(route, delay=d, speed_factors=factors), placed)
+                if fewest is None or count < fewest[0]:
+                    fewest = (count, d)
+                if count == 0:
+                    break
+            count, delay = fewest
+            landing = delay + (own[-1, 1] if len(own) else 0.0)
+            key = (too_long, count, landing, option)
+            if best is None or key < best[0]:
+                best = (key, delay, factors)
+        _, delay, factors = best
+        factors = list(factors)
+        for k in range(legs):
+            if factors[k] < 1.0:
+                trial = factors[:k] + [1.0] + factors[k+1:]
+                if not conflicts(dict(route, delay=delay, speed_factors=trial), placed):
+                    factors = trial
+        result = dict(route, delay=delay, speed_factors=factors)
+        traj = Trajectory(result, points)
+        result['time'] = traj.end_time - traj.takeoff
+        timed[idx] = result
+        placed.append(traj)
+        own = pieces(route, factors)
+        own[:, :2] += delay
+        placed_pieces = np.vstack([placed_pieces, own])
+    return timed
+
 # Calculate total path distance
 def calculate_path_distance(path):
     distance = 0
@@ -224,8 +493,8 @@ def plot_routes(routes, points):
     
     # Plot constraint range
     for i, route in enumerate(routes):
-        for t in np.linspace(0, route['time'], 20):
-            pos = get_position_at_time(route, t)
+        traj = Trajectory(route, points)
+        for pos in traj.positions(np.linspace(traj.takeoff, traj.end_time, 20)):
             circle = Circle(pos, min_separation/2, color=colors[i], alpha=0.1)
             plt.gca().add_patch(circle)
     
@@ -242,7 +511,8 @@ if __name__ == "__main__":
     num_uavs = 3
     
     print("Initial route planning:")
-    routes, total_distance = clarke_wright_savings(points, num_uavs)
+    with profiler.phase("savings"):
+        routes, total_distance = clarke_wright_savings(points, num_uavs)
     
     # Print initial results
     for i, route in enumerate(routes):
@@ -254,13 +524,29 @@ if __name__ == "__main__":
     print(f"\nTotal flight distance: {total_distance:.1f} m")
     
     # Check constraints
-    valid, message = check_separation_constraints(routes, points)
+    with profiler.phase("separation_check"):
+        valid, message = check_separation_constraints(routes, points)
     print(f"\nConstraint check: {message}")
     
+    # Fix timing first: takeoff delays and leg speeds, paths unchanged
+    if not valid:
+        print("\nDeconflicting takeoff times and leg speeds...")
+        with profiler.phase("deconflict_timing"):
+            timed_routes = deconflict_timing(routes, points)
+        valid, message = check_separation_constraints(timed_routes, points, airborne=True)
+        print(f"Constraint check after deconfliction (airborne UAVs): {message}")
+        if valid:
+            routes = timed_routes
+            for i, route in enumerate(routes):
+                speeds = ', '.join(f"{factor * uav_speed:.0f}" for factor in route['speed_factors'])
+                print(f"UAV {i+1}: takeoff at {route['delay']:.1f} s, "
+                      f"landing at {route['delay'] + route['time']:.1f} s, leg speeds {speeds} m/s")
+    
     # Adjust if needed
     if not valid:
         print("\nAdjusting routes to satisfy constraints...")
-        adjusted_routes = adjust_routes(routes, points)
+        with profiler.phase("adjust_routes"):
+            adjusted_routes = adjust_routes(routes, points)
         valid, message = check_separation_constraints(adjusted_routes, points)
         print(f"Constraint check after adjustment: {message}")
         
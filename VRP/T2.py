@@ -1,96 +1,135 @@
 import math
-import heapq
+import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.patches import Circle
+from repo_modules import profiler
+from grid_astar import grid_a_star
+from occupancy import OccupancyGrid
+from tangent_planner import tangent_path
+from dstar_lite import DStarLite
 
 
 class DronePathPlanner:
-    def __init__(self, drones, targets, obstacles=None):
+    def __init__(self, drones, targets, obstacles=None, planner="grid"):
         self.drones = drones  # 无人机初始位置和状态
         self.targets = targets  # 目标点字典 {名称: (x,y)}
         self.obstacles = obstacles if obstacles else []  # 障碍物列表 [(x,y,radius)]
 
+        # 规划网格与占据图（障碍物半径已加上50m安全距离）
+        self.grid_size = 2000  # 整个区域大小
+        self.resolution = 50  # 网格分辨率
+        self.occupancy = OccupancyGrid((0, self.grid_size, 0, self.grid_size), self.resolution,
+                                       margin=50, obstacles=self.obstacles)
+
+        # 增量重规划的搜索状态 {(目标, 网格原点): (DStarLite, 已同步的障碍物数, 同步时其他无人机的位置)}
+        # D* Lite 从目标反向搜索，状态与起点和哪架无人机无关，同一目标的各次规划（如各架返航、
+        # 多次 dynamic_replan）共用一份，障碍物事件后只修补变化附近，起点移动由 km 修正
+        self.searches = {}
+
+        # 避障规划器："grid" 为网格 A*，"tangent" 为切线可见图上的精确最短路，
+        # "incremental" 为保留搜索状态的 D* Lite（与 grid 同一网格、同样的代价）；
+        # 在这里的 50m 网格（41×41 个结点）上并不比 grid 快：dynamic_replan 每次事件都有新目标，
+        # 同一目标的起点又各不相同，修补范围接近从头搜索，而 A* 在这么小的网格上本来只要一两毫秒，
+        # 所以默认用 grid；网格更细、同一目标反复重规划时（见 dstar_lite.py 的示例）才划算
+        if planner == "grid":
+            self.plan_path = self.a_star
+        elif planner == "tangent":
+            self.plan_path = self.tangent_path
+        elif planner == "incremental":
+            self.plan_path = self.incremental_path
+        else:
+            raise ValueError(f"未知的规划器: {planner}，可选 grid、tangent 或 incremental")
+
         # 记录路径和分配方案
         self.paths = {drone_id: [pos] for drone_id, pos in drones.items()}
         self.allocations = {drone_id: [] for drone_id in drones}
 
     def euclidean_distance(self, a, b):
+        if profiler.enabled:
+            profiler.count("distance")
         return math.sqrt((a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2)
 
     def a_star(self, start, goal, drone_id, current_time):
-        """A*算法实现避障路径规划"""
-
-        def heuristic(pos):
-            return self.euclidean_distance(pos, goal)
-
-        # 定义网格大小和分辨率
-        grid_size = 2000  # 整个区域大小
-        resolution = 50  # 网格分辨率
-
-        open_set = []
-        heapq.heappush(open_set, (0 + heuristic(start), 0, start, [start]))
-        closed_set = set()
-
-        while open_set:
-            _, g, current, path = heapq.heappop(open_set)
-
-            if current in closed_set:
-                continue
-
-            closed_set.add(current)
-
-            # 检查是否到达目标
-            if self.euclidean_distance(current, goal) < resolution:
-                return path + [goal]
-
-            # 生成邻近节点
-            for dx in [-resolution, 0, resolution]:
-                for dy in [-resolution, 0, resolution]:
-                    if dx == 0 and dy == 0:
-                        continue
-
-                    neighbor = (current[0] + dx, current[1] + dy)
-
-                    # 检查边界
-                    if not (
-                        0 <= neighbor[0] <= grid_size and 0 <= neighbor[1] <= grid_size
-                    ):
-                        continue
-
-                    # 检查障碍物碰撞
-                    collision = False
-                    for ox, oy, radius in self.obstacles:
-                        if (
-                            self.euclidean_distance(neighbor, (ox, oy)) < radius + 50
-                        ):  # 50m安全距离
-                            collision = True
-                            break
-                    if collision:
-                        continue
-
-                    # 检查与其他无人机的安全距离
-                    safe = True
-                    for other_drone, other_pos in self.drones.items():
-                        if other_drone != drone_id:
-                            dist = self.euclidean_distance(neighbor, other_pos)
-                            if dist < 50:  # 最小间距约束
-                                safe = False
-                                break
-                    if not safe:
-                        continue
-
-                    new_g = g + self.euclidean_distance(current, neighbor)
-                    heapq.heappush(
-                        open_set,
-                        (
-                            new_g + heuristic(neighbor),
-                            new_g,
-                            neighbor,
-                            path + [neighbor],
-                        ),
-                    )
-
-        return None  # 没有找到路径
+        """A*算法实现避障路径规划（网格搜索见 grid_astar.py）"""
+        self._sync_occupancy()
+
+        # 障碍物碰撞由占据图判断，这里只检查与其他无人机的安全距离
+        def passable(x, y):
+            if profiler.enabled:
+                profiler.count("a_star.separation_checks")
+            for other_drone, other_pos in self.drones.items():
+                if other_drone != drone_id:
+                    if self.euclidean_distance((x, y), other_pos) < 50:  # 最小间距约束
+                        return False
+            return True
+
+        return grid_a_star(start, goal, self.resolution, (0, self.grid_size, 0, self.grid_size),
+                           passable, occupancy=self.occupancy)
+
+    def _sync_occupancy(self):
+        # 直接改了 self.obstacles 的情况：把还没栅格化的障碍物补进占据图
+        for obstacle in self.obstacles[len(self.occupancy.obstacles):]:
+            self.occupancy.add_obstacle(obstacle)
+
+    def incremental_path(self, start, goal, drone_id, current_time):
+        """D* Lite 增量重规划（见 dstar_lite.py），参数与 a_star 相同
+        每个目标保留一份搜索状态，再次规划时只修补障碍物或其他无人机位置变化影响到的部分"""
+        self._sync_occupancy()
+        x0, y0, occupied = self.occupancy.layer(*start)
+        others = {other: pos for other, pos in self.drones.items() if other != drone_id}
+        key = (goal, (x0, y0))
+
+        entry = self.searches.get(key)
+        if entry is None:
+            # 不可通行：占据图，加上其他无人机50m以内（最小间距约束）
+            blocked = occupied.copy()
+            self._mark_drones(blocked, x0 + np.arange(occupied.shape[0]) * self.resolution,
+                              y0 + np.arange(occupied.shape[1]) * self.resolution, others)
+            search = DStarLite(goal, (x0, y0), self.resolution, blocked)
+        else:
+            # 上次规划之后的变化只有两种：新障碍物，其他无人机移动（含换了哪架在规划）；
+            # 只在它们覆盖的小块格点上重算不可通行状态，交给 set_blocked
+            search, synced, synced_others = entry
+            windows = [self._footprint(x0, y0, occupied.shape, ox, oy, radius + self.occupancy.margin)
+                       for ox, oy, radius in self.occupancy.obstacles[synced:]]
+            for other in synced_others.keys() | others.keys():
+                if synced_others.get(other) != others.get(other):
+                    for pos in (synced_others.get(other), others.get(other)):
+                        if pos is not None:
+                            windows.append(self._footprint(x0, y0, occupied.shape, *pos, 50))
+            for i0, i1, j0, j1 in windows:
+                if i0 >= i1 or j0 >= j1:
+                    continue
+                cells = occupied[i0:i1, j0:j1].copy()
+                self._mark_drones(cells, x0 + np.arange(i0, i1) * self.resolution,
+                                  y0 + np.arange(j0, j1) * self.resolution, others)
+                rows, cols = np.nonzero(cells != search.blocked[i0:i1, j0:j1])
+                if len(rows):
+                    search.set_blocked((rows + i0) * search.ny + cols + j0, cells[rows, cols])
+        self.searches[key] = (search, len(self.occupancy.obstacles), others)
+        return search.plan(start)
+
+    # 位图（原点 x0, y0）里与 (x, y) 距离小于 reach 的格点所在的下标范围 [i0, i1) × [j0, j1)
+    def _footprint(self, x0, y0, shape, x, y, reach):
+        res = self.resolution
+        i0 = max(math.ceil((x - reach - x0) / res), 0)
+        i1 = min(math.floor((x + reach - x0) / res) + 1, shape[0])
+        j0 = max(math.ceil((y - reach - y0) / res), 0)
+        j1 = min(math.floor((y + reach - y0) / res) + 1, shape[1])
+        return i0, i1, j0, j1
+
+    # 在坐标为 xs × ys 的一块位图上标出其他无人机50m以内的格点
+    @staticmethod
+    def _mark_drones(cells, xs, ys, others):
+        for x, y in others.values():
+            cells |= np.sqrt((xs[:, None] - x) ** 2 + (ys[None, :] - y) ** 2) < 50
+
+    def tangent_path(self, start, goal, drone_id, current_time):
+        """切线可见图上的精确最短路（见 tangent_planner.py），参数与 a_star 相同"""
+        # 障碍物外扩50m安全距离，其他无人机看作半径50m的圆（最小间距约束）；不限制在网格区域内
+        circles = [(ox, oy, radius + 50) for ox, oy, radius in self.obstacles]
+        circles += [(x, y, 50) for other_drone, (x, y) in self.drones.items() if other_drone != drone_id]
+        return tangent_path(start, goal, circles)
 
     def assign_targets(self):
         """初始目标分配（简单最近邻方法）"""
@@ -115,8 +154,9 @@ class DronePathPlanner:
 
     def dynamic_replan(self, new_target, new_obstacle, current_time):
         """动态重规划处理新目标和障碍"""
-        # 添加新障碍
+        # 添加新障碍，占据图中只栅格化这一个
         self.obstacles.append(new_obstacle)
+        self.occupancy.add_obstacle(new_obstacle)
 
         # 添加新目标
         new_target_name = f"T{len(self.targets)+1}"
@@ -130,7 +170,8 @@ class DronePathPlanner:
             dist = self.euclidean_distance(pos, new_target)
             if dist < min_dist:
                 # 检查路径是否可行
-                path = self.a_star(pos, new_target, drone_id, current_time)
+                with profiler.phase("a_star"):
+                    path = self.plan_path(pos, new_target, drone_id, current_time)
                 if path:
                     min_dist = dist
                     best_drone = drone_id
@@ -145,7 +186,8 @@ class DronePathPlanner:
             self.drones[best_drone] = new_target
 
             # 重新规划该无人机的返航路径（如果需要）
-            return_path = self.a_star(new_target, (0, 0), best_drone, current_time)
+            with profiler.phase("a_star"):
+                return_path = self.plan_path(new_target, (0, 0), best_drone, current_time)
             if return_path:
                 self.paths[best_drone].extend(return_path[1:])
 
@@ -167,12 +209,15 @@ class DronePathPlanner:
                         break
 
                 if needs_replan:
-                    new_path = self.a_star(pos, next_point, drone_id, current_time)
+                    with profiler.phase("a_star"):
+                        new_path = self.plan_path(pos, next_point, drone_id, current_time)
                     if new_path:
                         self.paths[drone_id] = current_path[:-1] + new_path[1:]
 
     def line_circle_intersection(self, p1, p2, center, radius):
         """检查线段是否与圆相交"""
+        if profiler.enabled:
+            profiler.count("intersection")
         # 线段参数方程: p = p1 + t*(p2-p1), t∈[0,1]
         # 圆心到线段的距离
         x1, y1 = p1
@@ -297,55 +342,56 @@ class DronePathPlanner:
         plt.show()
 
 
-# 问题2的实例数据
-initial_drones = {"U1": (0, 0), "U2": (0, 0), "U3": (0, 0)}
-
-targets = {
-    "T1": (1200, 800),
-    "T2": (300, 450),
-    "T3": (950, 200),
-    "T4": (600, 1200),
-    "T5": (1500, 500),
-}
-
-# 创建路径规划器
-planner = DronePathPlanner(initial_drones, targets)
-
-# 初始目标分配
-planner.assign_targets()
-
-# 模拟在100s时新增障碍和紧急目标
-new_obstacle = (900, 250, 100)  # (x, y, radius)
-new_target = (800, 600)
-current_time = 100  # 假设在100s时发生动态变化
-
-# 动态重规划
-planner.dynamic_replan(new_target, new_obstacle, current_time)
-
-# 输出结果
-print("调整后的路径规划:")
-for drone_id, path in planner.paths.items():
-    print(f"{drone_id}路径:", " → ".join([f"({x},{y})" for x, y in path]))
-    print(
-        f"总飞行距离: {sum(planner.euclidean_distance(path[i], path[i+1]) for i in range(len(path)-1)):.1f}m"
-    )
-    print(f"分配的目标点: {planner.allocations[drone_id]}")
-    print()
-
-# 计算最短完成时间
-flight_times = []
-for drone_id, path in planner.paths.items():
-    distance = sum(
-        planner.euclidean_distance(path[i], path[i + 1]) for i in range(len(path) - 1)
-    )
-    time = distance / 50  # 假设最大速度50m/s
-    flight_times.append(time)
-
-shortest_time = max(flight_times)
-print(f"T1-T6全覆盖的最短时间: {shortest_time:.1f}s")
-
-# 可视化
-planner.visualize()
-
-# 动态可视化
-planner.animate(interval=500)
+if __name__ == "__main__":
+    # 问题2的实例数据
+    initial_drones = {"U1": (0, 0), "U2": (0, 0), "U3": (0, 0)}
+
+    targets = {
+        "T1": (1200, 800),
+        "T2": (300, 450),
+        "T3": (950, 200),
+        "T4": (600, 1200),
+        "T5": (1500, 500),
+    }
+
+    # 创建路径规划器
+    planner = DronePathPlanner(initial_drones, targets)
+
+    # 初始目标分配
+    planner.assign_targets()
+
+    # 模拟在100s时新增障碍和紧急目标
+    new_obstacle = (900, 250, 100)  # (x, y, radius)
+    new_target = (800, 600)
+    current_time = 100  # 假设在100s时发生动态变化
+
+    # 动态重规划
+    planner.dynamic_replan(new_target, new_obstacle, current_time)
+
+    # 输出结果
+    print("调整后的路径规划:")
+    for drone_id, path in planner.paths.items():
+        print(f"{drone_id}路径:", " → ".join([f"({x},{y})" for x, y in path]))
+        print(
+            f"总飞行距离: {sum(planner.euclidean_distance(path[i], path[i+1]) for i in range(len(path)-1)):.1f}m"
+        )
+        print(f"分配的目标点: {planner.allocations[drone_id]}")
+        print()
+
+    # 计算最短完成时间
+    flight_times = []
+    for drone_id, path in planner.paths.items():
+        distance = sum(
+            planner.euclidean_distance(path[i], path[i + 1]) for i in range(len(path) - 1)
+        )
+        time = distance / 50  # 假设最大速度50m/s
+        flight_times.append(time)
+
+    shortest_time = max(flight_times)
+    print(f"T1-T6全覆盖的最短时间: {shortest_time:.1f}s")
+
+    # 可视化
+    planner.visualize()
+
+    # 动态可视化
+    planner.animate(interval=500)
@@ -1,6 +1,7 @@
-import math
-import heapq
 import matplotlib.pyplot as plt
+from repo_modules import load
+
+Obstacle = load("Cluster.obstacle").Obstacle
 
 # 起点
 start_pos = (0, 0)
@@ -25,48 +26,7 @@ assignments = {
 # 圆形障碍区域
 obstacle_center = (900, 250)
 obstacle_radius = 100
-
-# 欧几里得距离
-def euclidean(p1, p2):
-    return math.hypot(p1[0] - p2[0], p1[1] - p2[1])
-
-# 判断是否在障碍区内
-def in_obstacle(pos, center=obstacle_center, radius=obstacle_radius):
-    return euclidean(pos, center) < radius
-
-# A*避障算法
-def a_star(start, goal, grid_size=20, bounds=(0, 1600, 0, 1300)):
-    x_min, x_max, y_min, y_max = bounds
-    open_set = []
-    heapq.heappush(open_set, (euclidean(start, goal), 0, start, [start]))
-    visited = set()
-
-    while open_set:
-        _, cost, current, path = heapq.heappop(open_set)
-        if euclidean(current, goal) <= grid_size:
-            path.append(goal)
-            return path
-
-        if current in visited:
-            continue
-        visited.add(current)
-
-        x, y = current
-        for dx in [-grid_size, 0, grid_size]:
-            for dy in [-grid_size, 0, grid_size]:
-                if dx == 0 and dy == 0:
-                    continue
-                neighbor = (x + dx, y + dy)
-                if (x_min <= neighbor[0] <= x_max and
-                    y_min <= neighbor[1] <= y_max and
-                    not in_obstacle(neighbor)):
-                    heapq.heappush(open_set, (
-                        cost + euclidean(neighbor, goal),
-                        cost + euclidean(neighbor, goal),
-                        neighbor,
-                        path + [neighbor]
-                    ))
-    return None
+obstacle = Obstacle(obstacle_center, obstacle_radius)
 
 # 绘图
 def plot_paths():
@@ -93,8 +53,9 @@ def plot_paths():
         path_y = [pos[1]]
         for pt_name in point_names:
             pt = targets[pt_name]
-            if drone == "U2":  # U2使用A*避障
-                segment = a_star(pos, pt)
+            if drone == "U2":  # U2避障：只有一个障碍圆，直接用切线-圆弧-切线的闭式最短绕行路线
+                route = obstacle.detour(pos, pt)
+                segment = route[0] if route else None
             else:
                 segment = [pos, pt]
             if segment:
@@ -105,7 +66,7 @@ def plot_paths():
         plt.plot(path_x, path_y, '--', label=f"{drone} Path", color=colors[drone])
 
     plt.legend()
-    plt.title("3-Drone Path Planning with A* Obstacle Avoidance for U2")
+    plt.title("3-Drone Path Planning with Tangent-Arc Obstacle Avoidance for U2")
     plt.grid(True)
     plt.axis("equal")
     plt.show()
@@ -0,0 +1,116 @@
+import math
+import time
+from distance_matrix import build_distance_matrix
+from local_search import improve_routes
+from genetic import genetic_solve
+from T1 import clarke_wright_savings, polar_routes, sweep_routes
+from repo_modules import load, profiler
+
+make_instance = load("instances").make_instance
+
+# 随时可停的规划流程：给定截止时间（毫秒），按由快到慢的顺序逐级求解
+#   1. 极角扫描，O(n log n)，几乎立刻给出第一个方案；预计来不及时改用不分环的极角均分（polar_routes），
+#      它只有一次排序，是任何截止时间下的保底方案（十万目标约 50ms，比这更紧的截止时间也会先把它算完再返回）
+#   2. 节约算法（目标多时用稀疏模式），预计来不及就跳过
+#   3. 对当前最优方案做局部搜索，用剩余时间作为时间上限
+#   4. 时间还多时以当前最优为种子跑遗传算法
+# 每得到一个更好的可行方案就调用 callback(route_details, total_distance, stage, elapsed_ms)，
+# 截止时返回目前最好的方案；max_distance 为单机航程上限，给定时只有满足它的方案算可行
+# 可行性只包括机队规模和航程上限，不含 T1_constraint.py 的间距（50m）与通信距离（1km）约束：
+# 所有无人机同时从基地起飞，不错开时间的话任何方案都违反间距约束，
+# 需要时对返回的路线再用 T1_constraint 的 adjust_routes / deconflict_timing 处理
+
+# 各阶段耗时的粗略估计（秒），用来判断剩余时间够不够，不够就不启动
+# 全量节约算法 O(n²)，稀疏模式（每点 10 个近邻）近似线性
+# 距离矩阵 n×n，局部搜索和遗传算法共用一份；目标超过 MATRIX_LIMIT 时内存放不下（两万目标约需 6GB），不建矩阵
+MATRIX_LIMIT = 5000
+
+def _estimate_sweep(n):
+    return 1.2e-6 * n
+
+def _estimate_savings(n):
+    return 4e-8 * n * n
+
+def _estimate_sparse_savings(n):
+    return 1.6e-5 * n
+
+def _estimate_matrix(n):
+    return 2e-8 * n * n
+
+def plan_anytime(points, num_vehicles, deadline_ms, callback=None, max_distance=None, seed=0):
+    start = time.perf_counter()
+    deadline = start + deadline_ms / 1000
+
+    def remaining():
+        return deadline - time.perf_counter()
+
+    best = {'routes': None, 'distance': math.inf, 'feasible': False}
+
+    def offer(route_details, total_distance, stage):
+        feasible = len(route_details) <= num_vehicles and (
+            max_distance is None or all(route['distance'] <= max_distance + 1e-6 for route in route_details))
+        # 还没有可行方案时先留着不可行的方案兜底，有了可行方案后只接受更好的可行方案
+        if best['feasible'] and not feasible:
+            return
+        if feasible == best['feasible'] and total_distance >= best['distance'] - 1e-9:
+            return
+        best.update(routes=route_details, distance=total_distance, feasible=feasible)
+        if feasible and callback is not None:
+            callback(route_details, total_distance, stage, (time.perf_counter() - start) * 1000)
+
+    n = len(points) - 1
+    if _estimate_sweep(n) < remaining():
+        with profiler.phase("anytime/sweep"):
+            offer(*sweep_routes(points, num_vehicles, max_distance), 'sweep')
+    else:
+        with profiler.phase("anytime/polar"):
+            offer(*polar_routes(points, num_vehicles), 'polar')
+
+    # 节约算法不考虑航程，有航程上限时直接从扫描解出发做带上限的局部搜索
+    # 全量模式来不及（或目标太多）时退到稀疏模式
+    if max_distance is None:
+        neighbors = None if n <= 5000 and _estimate_savings(n) < remaining() else 10
+        if neighbors is None or _estimate_sparse_savings(n) < remaining():
+            with profiler.phase("anytime/savings"):
+                offer(*clarke_wright_savings(points, num_vehicles, neighbors), 'savings')
+
+    matrix = None
+    if best['feasible'] and 1 < n <= MATRIX_LIMIT and _estimate_matrix(n) < remaining() / 2:
+        with profiler.phase("anytime/local_search"):
+            matrix = build_distance_matrix(points)
+            distance_matrix, locations = matrix
+            index_of = {name: idx for idx, name in enumerate(locations)}
+            routes = [[index_of[name] for name in route['path']] for route in best['routes']]
+            routes, _ = improve_routes(routes, distance_matrix, max_length=max_distance,
+                                       time_limit=max(remaining() - 0.05, 0))
+        route_details = []
+        for route in routes:
+            names = [locations[idx] for idx in route]
+            route_details.append({
+                'path': names,
+                'distance': float(sum(distance_matrix[route[i]][route[i+1]] for i in range(len(route)-1))),
+                'covered': [name for name in names if name != 'depot']
+            })
+        offer(route_details, sum(route['distance'] for route in route_details), 'local search')
+
+    # 遗传算法要起进程池，至少留一秒才值得启动，并预留收尾时间
+    budget = remaining() - 0.3
+    if (max_distance is None and best['feasible'] and budget > 1.0 and matrix is not None
+            and len(best['routes']) == num_vehicles <= n):
+        with profiler.phase("anytime/genetic"):
+            offer(*genetic_solve(points, num_vehicles, time_limit=budget, seed=seed,
+                                 initial_routes=best['routes'], distance_matrix=matrix), 'genetic')
+
+    return best['routes'], best['distance'], best['feasible']
+
+if __name__ == "__main__":
+    instance, _ = make_instance('uniform', 2000, seed=3)
+
+    def report(route_details, total_distance, stage, elapsed_ms):
+        print(f"{elapsed_ms:8.1f} ms  {stage:<12} {len(route_details)} 条路线  总距离 {total_distance:.1f} 米")
+
+    for deadline_ms in (50, 500, 3000):
+        print(f"截止时间 {deadline_ms} ms：")
+        began = time.perf_counter()
+        _, total, feasible = plan_anytime(instance, 20, deadline_ms, report)
+        print(f"返回用时 {(time.perf_counter() - began) * 1000:.1f} ms，总距离 {total:.1f} 米\n")
@@ -0,0 +1,58 @@
+import os
+from collections import OrderedDict
+import numpy as np
+
+# VRP 各求解器共用的距离矩阵
+# 用广播一次算出全部点对的欧几里得距离，按实例缓存，同一组点重复求解时直接复用
+# 缓存按字节数限制（默认 64MB），放不下的大矩阵算完直接返回、不缓存；
+# 环境变量 DISTANCE_CACHE_MB 可调整上限，设为 0 关闭缓存
+
+CACHE_BYTES = int(float(os.environ.get("DISTANCE_CACHE_MB", "64")) * 2**20)
+
+_cache = OrderedDict()
+
+
+# 缓存键：坐标统一成浮点元组，列表等不可哈希的坐标也能用，(0, 0) 与 [0.0, 0.0] 视为同一实例
+def instance_items(points):
+    return tuple((name, tuple(float(v) for v in coord)) for name, coord in points.items())
+
+
+def _compute(items, dtype):
+    coords = np.array([coord for _, coord in items], dtype=dtype).reshape(-1, 2)
+    x = coords[:, 0]
+    y = coords[:, 1]
+    # 分坐标原地运算，峰值内存只有两个 n×n 矩阵
+    matrix = x[:, None] - x[None, :]
+    matrix *= matrix
+    dy = y[:, None] - y[None, :]
+    dy *= dy
+    matrix += dy
+    np.sqrt(matrix, out=matrix)
+    # 缓存的矩阵会被多次返回，设为只读以免被调用方改坏
+    matrix.flags.writeable = False
+    return matrix
+
+
+def _cached_matrix(items, dtype):
+    key = (items, dtype)
+    if key in _cache:
+        _cache.move_to_end(key)
+        return _cache[key]
+    matrix = _compute(items, dtype)
+    if matrix.nbytes <= CACHE_BYTES:
+        _cache[key] = matrix
+        while sum(m.nbytes for m in _cache.values()) > CACHE_BYTES:
+            _cache.popitem(last=False)
+    return matrix
+
+
+def clear_cache():
+    _cache.clear()
+
+
+# 构建距离矩阵，返回 (矩阵, 位置名称列表)，矩阵行列顺序与 points 的键顺序一致
+# 点数上万时可传 dtype=np.float32 把内存减半
+def build_distance_matrix(points, dtype=np.float64):
+    items = instance_items(points)
+    locations = [name for name, _ in items]
+    return _cached_matrix(items, np.dtype(dtype)), locations
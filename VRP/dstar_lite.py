@@ -0,0 +1,246 @@
+import math
+import heapq
+from functools import lru_cache
+from array import array
+import numpy as np
+from repo_modules import profiler
+
+# 增量重规划：八邻域网格上的 D* Lite，供 T2.py 的 dynamic_replan 使用
+# 从目标向起点反向搜索，g[u] 是结点 u 到目标的最短距离，与起点无关，所以：
+#   - 同一目标的搜索状态可以一直保留，无人机沿路径移动、换了起点时只需把新起点附近补算完
+#   - 新增障碍物（或其他无人机移动）后只对变了的结点的邻居重新计算，其余结点的 g 原样沿用；
+#     变了哪些结点可以由调用方用 set_blocked 直接给出，也可以交给 plan 比较前后两张位图
+# 代价与 grid_astar.py 一致：走进不可通行结点的边代价无穷（起点本身不检查），
+# 与目标距离小于一个步长的结点直接连到目标，代价为到目标的直线距离
+
+_SQRT2 = math.sqrt(2)
+_TOLERANCE = 1e-6
+_STEPS = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if dx or dy]
+
+
+# 每个结点的邻居 (编号, 步长)，同样大小的网格共用一份
+@lru_cache(maxsize=8)
+def _adjacency(nx, ny, resolution):
+    moves = [(dx, dy, math.sqrt((dx * resolution) ** 2 + (dy * resolution) ** 2)) for dx, dy in _STEPS]
+    return tuple(tuple((a * ny + b, step) for dx, dy, step in moves
+                       for a, b in ((i + dx, j + dy),) if 0 <= a < nx and 0 <= b < ny)
+                 for i in range(nx) for j in range(ny))
+
+
+class DStarLite:
+    """网格 (x0 + i·resolution, y0 + j·resolution) 上到固定目标的增量最短路，blocked 为 (nx, ny) 的不可通行位图"""
+
+    def __init__(self, goal, origin, resolution, blocked):
+        self.goal = goal
+        self.origin = origin
+        self.resolution = resolution
+        self.blocked = blocked.copy()
+        self.nx, self.ny = blocked.shape
+        size = self.nx * self.ny
+        self.g = array("d", [math.inf]) * size
+        self.rhs = array("d", [math.inf]) * size
+        self.cell = bytearray(self.blocked.tobytes())
+        # 队列里每个结点只认最后一次入队的键，其余条目出堆时丢弃
+        self.queued = {}
+        self.open_set = []
+        self.km = 0.0
+        self.last = None
+        self.start = None
+        self.adjacency = _adjacency(self.nx, self.ny, resolution)
+
+        # 目标附近的结点：到目标的直线距离就是它的 rhs
+        x0, y0 = origin
+        gx, gy = goal
+        self.goal_cost = {}
+        i0 = max(math.ceil((gx - resolution - x0) / resolution), 0)
+        i1 = min(math.floor((gx + resolution - x0) / resolution), self.nx - 1)
+        j0 = max(math.ceil((gy - resolution - y0) / resolution), 0)
+        j1 = min(math.floor((gy + resolution - y0) / resolution), self.ny - 1)
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                x, y = x0 + i * resolution, y0 + j * resolution
+                d = math.sqrt((x - gx) ** 2 + (y - gy) ** 2)
+                if d < resolution:
+                    node = i * self.ny + j
+                    self.goal_cost[node] = d
+                    self.rhs[node] = d
+        self._expanded = 0
+        # set_blocked 改动后待重算的结点
+        self._pending = set()
+
+    def coord(self, node):
+        i, j = divmod(node, self.ny)
+        return self.origin[0] + i * self.resolution, self.origin[1] + j * self.resolution
+
+    # 八邻域上的距离下界（对角步长 √2），对起点是一致的启发
+    def _h(self, a, b):
+        ai, aj = divmod(a, self.ny)
+        bi, bj = divmod(b, self.ny)
+        di, dj = abs(ai - bi), abs(aj - bj)
+        if di < dj:
+            di, dj = dj, di
+        return self.resolution * (di + (_SQRT2 - 1) * dj)
+
+    def _key(self, node):
+        g, rhs = self.g[node], self.rhs[node]
+        best = g if g < rhs else rhs
+        return (best + self._h(self.start, node) + self.km, best)
+
+    # 不可通行的结点谁也走不进来，除了当起点以外用不到它的 g，所以不维护
+    def _update(self, node):
+        g, cell = self.g, self.cell
+        if cell[node] and node != self.start:
+            self.queued.pop(node, None)
+            return
+        rhs = self.goal_cost.get(node, math.inf)
+        for v, step in self.adjacency[node]:
+            if not cell[v] and step + g[v] < rhs:
+                rhs = step + g[v]
+        self.rhs[node] = rhs
+        if g[node] != rhs:
+            key = self._key(node)
+            self.queued[node] = key
+            heapq.heappush(self.open_set, (key, node))
+        else:
+            self.queued.pop(node, None)
+
+    def _top(self):
+        open_set, queued = self.open_set, self.queued
+        while open_set and queued.get(open_set[0][1]) != open_set[0][0]:
+            heapq.heappop(open_set)
+        return open_set[0] if open_set else None
+
+    def _compute(self):
+        g, rhs, start = self.g, self.rhs, self.start
+        while True:
+            top = self._top()
+            if top is None:
+                break
+            # 键与起点相同的结点也要处理：它们可能就在最短路上，不一致的话沿 g 下降会走错；
+            # 键由不同顺序的浮点加法得到，比较时留一点余量
+            if top[0][0] > self._key(start)[0] + _TOLERANCE and rhs[start] == g[start]:
+                break
+            key, node = top
+            new_key = self._key(node)
+            if key < new_key:
+                self.queued[node] = new_key
+                heapq.heappush(self.open_set, (new_key, node))
+                continue
+            self._expanded += 1
+            del self.queued[node]
+            if g[node] > rhs[node]:
+                g[node] = rhs[node]
+            else:
+                g[node] = math.inf
+                self._update(node)
+            # node 的 g 变了，以 node 为后继的邻居都要重算（node 不可通行时它们本来就走不进来）
+            if not self.cell[node]:
+                for u, _ in self.adjacency[node]:
+                    self._update(u)
+
+    # 把结点 nodes（编号数组）的不可通行状态改成 values；受影响的结点先记下，
+    # 等下次 plan 更新了起点和 km 之后再放回队列修补
+    # 调用方知道哪些格点变了时用它，省去 plan 里整张位图的比较和复制
+    def set_blocked(self, nodes, values):
+        affected = set()
+        for v, value in zip(nodes.tolist(), values.tolist()):
+            if self.cell[v] == value:
+                continue
+            self.cell[v] = value
+            self.blocked.flat[v] = value
+            # 它的邻居走进去的代价变了；重新变得可通行的结点自己的 g 也没有维护过，一起重算
+            affected.add(v)
+            affected.update(u for u, _ in self.adjacency[v])
+        self._pending |= affected
+
+    # 在当前不可通行位图下从 start（网格结点坐标）到目标的路径 [start, ..., goal]，不可达时返回 None
+    # blocked 为新的整张位图，与上次比较找出变化；为 None 时沿用 set_blocked 维护的位图
+    def plan(self, start, blocked=None):
+        x0, y0 = self.origin
+        i = round((start[0] - x0) / self.resolution)
+        j = round((start[1] - y0) / self.resolution)
+        if not (0 <= i < self.nx and 0 <= j < self.ny):
+            return None
+        node = i * self.ny + j
+        first = self.last is None
+        if not first:
+            self.km += self._h(self.last, node)
+        self.last = self.start = node
+        self._expanded = 0
+        if first:
+            for u in self.goal_cost:
+                self._update(u)
+        elif self.cell[node]:
+            # 起点在不可通行区域里（如其他无人机附近），它的 g 之前没有维护
+            self._update(node)
+
+        # 只处理前后不可通行状态不同的结点
+        if blocked is not None:
+            changed = np.flatnonzero(blocked != self.blocked)
+            self.set_blocked(changed, blocked.flat[changed])
+        pending, self._pending = self._pending, set()
+        for u in pending:
+            self._update(u)
+        self._compute()
+        if profiler.enabled:
+            profiler.count("dstar.changed_cells", len(pending))
+            profiler.count("dstar.expansions", self._expanded)
+
+        g, rhs, cell = self.g, self.rhs, self.cell
+        if rhs[node] == math.inf:
+            return None
+        # 沿 rhs 下降方向走到目标
+        path = [start]
+        for _ in range(self.nx * self.ny):
+            finish = self.goal_cost.get(node, math.inf)
+            best, best_next = math.inf, None
+            for v, step in self.adjacency[node]:
+                if not cell[v] and step + g[v] < best:
+                    best, best_next = step + g[v], v
+            if finish <= best:
+                path.append(self.goal)
+                return path
+            node = best_next
+            path.append(self.coord(node))
+        return None
+
+
+if __name__ == "__main__":
+    import time
+    from grid_astar import grid_a_star
+    from occupancy import OccupancyGrid
+
+    # 无人机从 (0, 0) 飞往 (1950, 1950)，每飞出一段就在前方航线上出现一个新障碍物，从当前位置重规划：
+    # 网格 A* 每次从头搜索，D* Lite 保留同一目标的搜索状态（起点移动由 km 修正），只修补新障碍物附近
+    bounds = (0, 2000, 0, 2000)
+    resolution = 10
+    goal = (1950, 1950)
+    occupancy = OccupancyGrid(bounds, resolution, margin=50, obstacles=[(600, 500, 150), (1300, 1400, 200)])
+
+    def path_length(path):
+        return sum(math.dist(path[i], path[i + 1]) for i in range(len(path) - 1))
+
+    position = (0, 0)
+    x0, y0, occupied = occupancy.layer(*position)
+    search = DStarLite(goal, (x0, y0), resolution, occupied)
+    begin = time.perf_counter()
+    path = search.plan(position, occupied)
+    print(f"首次规划: D* Lite {(time.perf_counter() - begin) * 1000:.1f} ms，路径长 {path_length(path):.1f}m")
+
+    astar_time = dstar_time = 0.0
+    for k in range(5):
+        # 飞出一段，前方航线上出现新障碍物
+        position = path[len(path) // 4]
+        ahead = path[len(path) // 2]
+        occupancy.add_obstacle((ahead[0], ahead[1], 60))
+        _, _, occupied = occupancy.layer(*position)
+
+        begin = time.perf_counter()
+        reference = grid_a_star(position, goal, resolution, bounds, occupancy=occupancy)
+        astar_time += time.perf_counter() - begin
+        begin = time.perf_counter()
+        path = search.plan(position, occupied)
+        dstar_time += time.perf_counter() - begin
+        print(f"第{k + 1}次重规划 起点{position}: D* Lite 扩展 {search._expanded} 个结点，"
+              f"路径长 {path_length(path):.1f}m（A* {path_length(reference):.1f}m）")
+    print(f"重规划合计：网格 A* 从头搜索 {astar_time * 1000:.1f} ms，D* Lite 增量 {dstar_time * 1000:.1f} ms")
@@ -0,0 +1,222 @@
+import os
+import time
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
+from distance_matrix import build_distance_matrix
+from local_search import improve_routes
+from T1 import clarke_wright_savings
+from repo_modules import load
+
+make_instance = load("instances").make_instance
+
+# 多无人机 mTSP 的遗传/模因算法，用计算时间换解的质量
+# 编码：长度为 目标数+无人机数-1 的排列，取值 0..k-1 表示第几个目标，k.. 表示路线分隔符；
+# 解码时分隔符都换成基地，前后各补一个基地，相邻两个基地之间就是一架无人机的路线
+# 整个种群的适应度一次算出：把排列映射成位置下标后，用花式索引从距离矩阵里取出所有边求和
+# 多个岛屿（子种群）放在进程池里各自进化，每个时间片结束后把各岛最优个体环形迁移到下一个岛
+
+
+# 染色体与下标路线互转，node_of[token] 为该基因对应的位置下标（分隔符对应基地）
+def encode(routes, token_of):
+    k = len(token_of)
+    genes = []
+    for r, route in enumerate(routes):
+        if r > 0:
+            genes.append(k + r - 1)
+        genes.extend(token_of[idx] for idx in route[1:-1])
+    return np.array(genes, dtype=np.int64)
+
+def decode(chromosome, node_of, k, depot_index):
+    routes, route = [], [depot_index]
+    for gene in chromosome.tolist():
+        if gene >= k:
+            routes.append(route + [depot_index])
+            route = [depot_index]
+        else:
+            route.append(node_of[gene])
+    routes.append(route + [depot_index])
+    return routes
+
+# 整个种群的适应度：总距离 + 空路线罚分（每架无人机至少飞一个目标）
+def population_fitness(population, dist, node_of, k, depot_index, penalty):
+    size = len(population)
+    nodes = node_of[population]
+    depot = np.full((size, 1), depot_index, dtype=np.int64)
+    seq = np.hstack([depot, nodes, depot])
+    total = dist[seq[:, :-1], seq[:, 1:]].sum(axis=1)
+    delimiter = population >= k
+    empty = (delimiter[:, 0].astype(np.int64) + delimiter[:, -1]
+             + (delimiter[:, 1:] & delimiter[:, :-1]).sum(axis=1))
+    return total + penalty * empty
+
+# 顺序交叉（OX）：保留 a 的一段，其余基因按 b 中的先后顺序补齐
+def order_crossover(a, b, rng):
+    length = len(a)
+    i, j = sorted(rng.choice(length + 1, 2, replace=False))
+    kept = a[i:j]
+    rest = b[~np.isin(b, kept)]
+    return np.concatenate([rest[:i], kept, rest[i:]])
+
+# 变异：反转一小段（相当于 2-opt，也能跨路线）或交换两个基因；
+# 段长限制在染色体的十分之一以内，大段反转几乎总是变差
+def mutate(child, rng, rate):
+    if rng.random() < rate:
+        span = int(rng.integers(2, max(3, len(child) // 10) + 1))
+        i = int(rng.integers(0, max(len(child) - span, 0) + 1))
+        child[i:i+span] = child[i:i+span][::-1]
+    if rng.random() < rate / 2:
+        i, j = rng.choice(len(child), 2, replace=False)
+        child[i], child[j] = child[j], child[i]
+    return child
+
+# 单个岛屿在时间片内进化：锦标赛选择、OX 交叉、变异、精英保留；
+# 每隔 memetic_every 代挑一个个体跑一遍局部搜索，结果替换最差个体（模因算法）
+def evolve(population, dist, node_of, k, depot_index, budget, seed,
+           elite=2, mutation_rate=0.3, memetic_every=2):
+    rng = np.random.default_rng(seed)
+    penalty = 10 * float(dist.max())
+    fitness = population_fitness(population, dist, node_of, k, depot_index, penalty)
+    token_of = {int(node): token for token, node in enumerate(node_of[:k].tolist())}
+    start = time.perf_counter()
+    generation = 0
+    size = len(population)
+    last = 0.0
+    # 按上一代的耗时预判，下一代做不完就不开始，时间片不超时
+    while time.perf_counter() - start + last < budget:
+        began = time.perf_counter()
+        generation += 1
+        order = np.argsort(fitness)
+        children = [population[idx].copy() for idx in order[:elite]]
+        # 锦标赛选择一次性抽好所有父代
+        picks = rng.integers(size, size=(size - elite, 2, 2))
+        winners = np.where(fitness[picks[..., 0]] <= fitness[picks[..., 1]], picks[..., 0], picks[..., 1])
+        for a, b in winners:
+            child = order_crossover(population[a], population[b], rng)
+            children.append(mutate(child, rng, mutation_rate))
+        population = np.array(children)
+        fitness = population_fitness(population, dist, node_of, k, depot_index, penalty)
+        if memetic_every and generation % memetic_every == 0:
+            # 局部搜索随机挑一个非精英个体：精英已经是局部最优，扰动过的个体再下降才可能跳出
+            pick = int(rng.integers(elite, size))
+            routes = decode(population[pick], node_of, k, depot_index)
+            if all(len(route) > 2 for route in routes):
+                routes, _ = improve_routes(routes, dist, time_limit=budget / 10)
+                worst = int(np.argmax(fitness))
+                population[worst] = encode(routes, token_of)
+                fitness[worst] = population_fitness(population[worst:worst+1], dist, node_of, k,
+                                                    depot_index, penalty)[0]
+        last = time.perf_counter() - began
+    return population, fitness
+
+# ---------------- 岛屿进程池 ----------------
+# 距离矩阵放进共享内存，各子进程只读挂载，与 T1_tjh.py 的多进程枚举相同
+_island = {}
+
+def _init_island(shm_name, shape, dtype, node_of, k, depot_index):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    _island["shm"] = shm
+    _island["dist"] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    _island["args"] = (node_of, k, depot_index)
+
+def _evolve_island(task):
+    population, budget, seed = task
+    return evolve(population, _island["dist"], *_island["args"], budget, seed)
+
+# 以 clarke_wright_savings 的结果为种子：种子本身、对种子随机反转若干段得到的变体，以及少量随机排列
+def initial_population(seed_chromosome, size, rng):
+    population = [seed_chromosome.copy()]
+    while len(population) < size:
+        if len(population) % 5 == 0:
+            population.append(rng.permutation(seed_chromosome))
+            continue
+        child = seed_chromosome.copy()
+        for _ in range(rng.integers(1, 4)):
+            mutate(child, rng, 1.0)
+        population.append(child)
+    return np.array(population)
+
+# 遗传算法求解入口，返回格式与 clarke_wright_savings 相同
+# time_limit 为总墙钟时间（秒，含建进程池等开销），按 epochs 个时间片轮流进化、迁移；
+# initial_routes 为 clarke_wright_savings 返回的路线详情，不给时现算一份（含局部搜索）
+# distance_matrix 为调用方已建好的 build_distance_matrix(points) 结果 (矩阵, 点名列表)，给定时不再重建
+def genetic_solve(points, num_vehicles, time_limit=5.0, islands=4, population=60,
+                  epochs=5, processes=None, seed=0, initial_routes=None, distance_matrix=None):
+    deadline = time.perf_counter() + time_limit
+    distance_matrix, locations = distance_matrix or build_distance_matrix(points)
+    depot_index = locations.index('depot')
+    targets = [idx for idx in range(len(locations)) if idx != depot_index]
+    k = len(targets)
+    if num_vehicles > k:
+        raise ValueError(f"目标点数 {k} 少于无人机数 {num_vehicles}，无法保证每架无人机至少一个目标")
+    node_of = np.array(targets + [depot_index] * (num_vehicles - 1), dtype=np.int64)
+    token_of = {idx: token for token, idx in enumerate(targets)}
+    if initial_routes is None:
+        initial_routes, _ = clarke_wright_savings(points, num_vehicles, improve=True)
+    index_of = {name: idx for idx, name in enumerate(locations)}
+    seed_routes = [[index_of[name] for name in route['path']] for route in initial_routes]
+    if len(seed_routes) != num_vehicles:
+        raise ValueError(f"初始解有 {len(seed_routes)} 条路线，与无人机数 {num_vehicles} 不一致")
+    seed_chromosome = encode(seed_routes, token_of)
+
+    rng = np.random.default_rng(seed)
+    pools = [initial_population(seed_chromosome, population, rng) for _ in range(islands)]
+    processes = min(processes or os.cpu_count(), islands)
+    best, best_fitness = seed_chromosome, np.inf
+
+    shm = shared_memory.SharedMemory(create=True, size=distance_matrix.nbytes)
+    try:
+        np.ndarray(distance_matrix.shape, dtype=distance_matrix.dtype, buffer=shm.buf)[:] = distance_matrix
+        with multiprocessing.Pool(
+            processes, initializer=_init_island,
+            initargs=(shm.name, distance_matrix.shape, distance_matrix.dtype, node_of, k, depot_index)
+        ) as pool:
+            for epoch in range(epochs):
+                # 每个时间片按剩余时间重新分配，启动开销和上一片的误差由后面的时间片吸收；
+                # 进程数少于岛屿数时各岛轮流占用进程，时间片按此折算
+                budget = (deadline - time.perf_counter()) / (epochs - epoch) * processes / islands
+                if budget <= 0:
+                    break
+                tasks = [(pools[i], budget, seed * 1000 + epoch * islands + i) for i in range(islands)]
+                results = pool.map(_evolve_island, tasks)
+                pools = [pop for pop, _ in results]
+                leaders = []
+                for pop, fit in results:
+                    idx = int(np.argmin(fit))
+                    leaders.append(pop[idx])
+                    if fit[idx] < best_fitness:
+                        best, best_fitness = pop[idx].copy(), float(fit[idx])
+                # 环形迁移：每个岛最差的个体换成上一个岛的最优个体
+                for i, (pop, fit) in enumerate(results):
+                    pools[i][int(np.argmax(fit))] = leaders[i - 1]
+    finally:
+        shm.close()
+        shm.unlink()
+
+    routes = decode(best, node_of, k, depot_index)
+    route_details = []
+    total_distance = 0
+    for route in routes:
+        route_distance = float(sum(distance_matrix[route[i]][route[i+1]] for i in range(len(route)-1)))
+        total_distance += route_distance
+        route_names = [locations[idx] for idx in route]
+        route_details.append({
+            'path': route_names,
+            'distance': route_distance,
+            'covered': [loc for loc in route_names if loc != 'depot']
+        })
+    return route_details, total_distance
+
+if __name__ == "__main__":
+    instance, _ = make_instance('clustered', 200, seed=1)
+    num_uavs = 5
+    _, cw_distance = clarke_wright_savings(instance, num_uavs)
+    seed_routes, ls_distance = clarke_wright_savings(instance, num_uavs, improve=True)
+    start = time.perf_counter()
+    routes, ga_distance = genetic_solve(instance, num_uavs, time_limit=10.0, initial_routes=seed_routes)
+    elapsed = time.perf_counter() - start
+    print(f"{len(instance)-1} 个目标、{num_uavs} 架无人机")
+    print(f"节约算法：{cw_distance:.1f} 米")
+    print(f"节约算法 + 局部搜索：{ls_distance:.1f} 米")
+    print(f"遗传算法（{elapsed:.1f} 秒）：{ga_distance:.1f} 米")
+    print(f"每架无人机目标数：{[len(route['covered']) for route in routes]}")
@@ -0,0 +1,119 @@
+import math
+import heapq
+from array import array
+from repo_modules import profiler
+
+# 八邻域网格上的 A* 核心，供 T2.py 使用
+# 网格以起点为原点、步长 resolution，结点用整数下标 (ix, iy) 压成一个编号：
+#   - 父结点存在一维数组 parent 里，到达目标时才沿父指针回溯出整条路径，堆里只放 (f, g, 编号)
+#   - 关闭/已检查可通行/不可通行三种状态放在一个 bytearray 里，每个结点一个字节
+#   - best_g 记录每个结点目前最小的 g，更差的入堆直接省掉
+# 编号按 (ix, iy) 字典序排列，f、g 相同时按编号出堆；g 相同的两条路保留先找到的一条，整条路径只在到达目标时回溯一次
+# 给定 occupancy（occupancy.py 的占据图）时，静态障碍物直接从位图初始化到状态字节里，不再逐个结点回调
+
+_CLOSED = 1
+_CHECKED = 2
+_BLOCKED = 4
+
+# 位图中 1 表示占据，映射成“已检查且不可通行”
+_OCCUPIED = bytes([0, _CHECKED | _BLOCKED]) + bytes(254)
+
+_STEPS = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if dx or dy]
+
+
+# start、goal 为坐标；bounds=(x_min, x_max, y_min, y_max) 为网格结点允许的坐标范围（含边界）；
+# passable(x, y) 判断结点能否经过，每个结点最多调用一次（起点不检查）；
+# reached(x, y) 判断是否已到目标附近，默认与目标距离小于一个步长；
+# occupancy 为同一分辨率、覆盖 bounds 的占据图，占据的结点不会再调用 passable
+# 返回 [start, ..., 最后一个网格结点, goal]，找不到路径时返回 None
+def grid_a_star(start, goal, resolution, bounds, passable=None, reached=None, occupancy=None):
+    sx, sy = start
+    gx, gy = goal
+    x_min, x_max, y_min, y_max = bounds
+    ix_min = math.ceil((x_min - sx) / resolution)
+    ix_max = math.floor((x_max - sx) / resolution)
+    iy_min = math.ceil((y_min - sy) / resolution)
+    iy_max = math.floor((y_max - sy) / resolution)
+    nx, ny = ix_max - ix_min + 1, iy_max - iy_min + 1
+    if nx <= 0 or ny <= 0:
+        return None
+    if reached is None:
+        def reached(x, y):
+            return math.sqrt((x - gx) ** 2 + (y - gy) ** 2) < resolution
+
+    size = nx * ny
+    parent = array("l", [-1]) * size
+    best_g = array("d", [math.inf]) * size
+    if occupancy is None:
+        state = bytearray(size)
+    else:
+        window = occupancy.window(sx, sy, ix_min, ix_max, iy_min, iy_max)
+        state = bytearray(window.tobytes().translate(_OCCUPIED))
+    # 各方向一步的编号增量与代价（与按坐标求欧氏距离完全相同）
+    moves = [(dx, dy, dx * ny + dy, math.sqrt((dx * resolution) ** 2 + (dy * resolution) ** 2))
+             for dx, dy in _STEPS]
+
+    def coord(node):
+        ix, iy = divmod(node, ny)
+        return sx + (ix + ix_min) * resolution, sy + (iy + iy_min) * resolution
+
+    # 从起点到 node 的坐标序列
+    def trace(node):
+        path = []
+        while node != origin:
+            path.append(coord(node))
+            node = parent[node]
+        path.append(start)
+        return path[::-1]
+
+    # 起点对应下标 (0, 0)，不在范围内时无解
+    if not (ix_min <= 0 <= ix_max and iy_min <= 0 <= iy_max):
+        return None
+    origin = -ix_min * ny - iy_min
+    h0 = math.sqrt((sx - gx) ** 2 + (sy - gy) ** 2)
+    best_g[origin] = 0.0
+    open_set = [(h0, 0.0, origin)]
+    expansions = 0
+
+    while open_set:
+        _, g, node = heapq.heappop(open_set)
+        if state[node] & _CLOSED:
+            continue
+        state[node] |= _CLOSED
+        expansions += 1
+        ix, iy = divmod(node, ny)
+        x, y = sx + (ix + ix_min) * resolution, sy + (iy + iy_min) * resolution
+        if reached(x, y):
+            if profiler.enabled:
+                profiler.count("a_star.expansions", expansions)
+            return trace(node) + [goal]
+
+        for dx, dy, offset, step in moves:
+            jx, jy = ix + dx, iy + dy
+            if not (0 <= jx < nx and 0 <= jy < ny):
+                continue
+            neighbor = node + offset
+            flags = state[neighbor]
+            if flags & _CLOSED:
+                continue
+            new_g = g + step
+            # g 相同的另一条路不换父结点：邻居按固定顺序展开，先找到的保留，结果确定
+            if new_g >= best_g[neighbor]:
+                continue
+            px, py = sx + (jx + ix_min) * resolution, sy + (jy + iy_min) * resolution
+            if not flags & _CHECKED:
+                flags |= _CHECKED
+                if passable is not None and not passable(px, py):
+                    flags |= _BLOCKED
+                state[neighbor] = flags
+            if flags & _BLOCKED:
+                continue
+            best_g[neighbor] = new_g
+            parent[neighbor] = node
+            if profiler.enabled:
+                profiler.count("a_star.pushes")
+            heapq.heappush(open_set, (new_g + math.sqrt((px - gx) ** 2 + (py - gy) ** 2), new_g, neighbor))
+
+    if profiler.enabled:
+        profiler.count("a_star.expansions", expansions)
+    return None
@@ -0,0 +1,263 @@
+import time
+import numpy as np
+
+# 路线局部搜索：在 clarke_wright_savings 等构造算法给出的路线上继续改进
+# 路线为下标列表 [depot, ..., depot]，所有移动的增量都只查距离矩阵中被改动的几条边，O(1) 求出
+# 每个点只和自己的 k 个最近邻尝试配对（邻居表），配合 don't-look bits：
+# 一个点周围没有改进时就把它“关掉”，直到它附近的边被某次移动改动才重新打开
+
+
+# 每个目标点距离最近的 k 个目标点，分块计算避免一次取出整块子矩阵
+def neighbor_lists(distance_matrix, nodes, k, block=1024):
+    nodes = np.asarray(nodes, dtype=np.int64)
+    k = min(k, len(nodes) - 1)
+    result = {}
+    if k <= 0:
+        return {int(u): [] for u in nodes}
+    for start in range(0, len(nodes), block):
+        rows = nodes[start : start + block]
+        sub = np.array(distance_matrix[rows[:, None], nodes[None, :]], dtype=float)
+        sub[np.arange(len(rows)), np.arange(start, start + len(rows))] = np.inf
+        nearest = np.argpartition(sub, k - 1, axis=1)[:, :k]
+        order = np.argsort(np.take_along_axis(sub, nearest, axis=1), axis=1)
+        nearest = np.take_along_axis(nearest, order, axis=1)
+        for u, near in zip(rows.tolist(), nodes[nearest].tolist()):
+            result[u] = near
+    return result
+
+
+# 距离矩阵按行懒转换成 Python 列表：d[a][b] 走列表下标比 ndarray 取元素快得多，
+# 只转换本次搜索实际查到的行，不整块 tolist()；随 RouteLocalSearch 对象一起释放
+class _Rows(dict):
+    def __init__(self, matrix):
+        super().__init__()
+        self.matrix = matrix
+
+    def __missing__(self, u):
+        row = self[u] = self.matrix[u].tolist()
+        return row
+
+
+class RouteLocalSearch:
+    """对一组路线做 2-opt、Or-opt、relocate、swap 与 cross-exchange 改进
+
+    max_length 为单条路线长度上限（续航对应的距离），为 None 时不限制；
+    移动不会把任何一条路线清空，保证出动的无人机数不变
+    """
+
+    def __init__(self, routes, distance_matrix, neighbors=10, max_length=None):
+        self.d = _Rows(np.asarray(distance_matrix))
+        self.routes = [list(route) for route in routes]
+        self.max_length = max_length
+        self.depot = self.routes[0][0] if self.routes else 0
+        self.route_of = {}
+        self.index = {}
+        self.prefix = [None] * len(self.routes)
+        for r in range(len(self.routes)):
+            self._reindex(r)
+        nodes = [u for route in self.routes for u in route[1:-1]]
+        self.nbrs = neighbor_lists(distance_matrix, nodes, neighbors) if nodes else {}
+        self.active = set(nodes)
+        self.moves = {name: 0 for name in ("2-opt", "or-opt", "relocate", "swap", "cross-exchange")}
+
+    # 路线 [start, stop) 区间的点位置变了：只更新这一段的下标，前缀距离作废等用到时再算
+    def _reindex(self, r, start=1, stop=None):
+        route = self.routes[r]
+        stop = len(route) - 1 if stop is None else stop
+        route_of, index = self.route_of, self.index
+        for i in range(start, stop):
+            route_of[route[i]] = r
+            index[route[i]] = i
+        self.prefix[r] = None
+
+    # 路线从基地出发到各位置的累计距离，只在有长度上限时才需要
+    def _prefix(self, r):
+        if self.prefix[r] is None:
+            route = self.routes[r]
+            d = self.d
+            prefix = [0.0] * len(route)
+            for i in range(1, len(route)):
+                prefix[i] = prefix[i - 1] + d[route[i - 1]][route[i]]
+            self.prefix[r] = prefix
+        return self.prefix[r]
+
+    def _length(self, r):
+        return self._prefix(r)[-1]
+
+    # 路线 r 长度变化 delta 后是否仍满足上限
+    def _fits(self, r, delta):
+        return self.max_length is None or self._length(r) + delta <= self.max_length + 1e-9
+
+    def _wake(self, *nodes):
+        for u in nodes:
+            if u != self.depot:
+                self.active.add(u)
+
+    def total_distance(self):
+        return sum(self._length(r) for r in range(len(self.routes)))
+
+    def run(self, time_limit=None, start=None):
+        start = time.perf_counter() if start is None else start
+        while self.active:
+            if time_limit is not None and time.perf_counter() - start > time_limit:
+                break
+            u = self.active.pop()
+            if self._improve(u):
+                self.active.add(u)
+        return self.routes
+
+    # 依次尝试以 u 为中心的各类移动，找到第一个改进就执行
+    def _improve(self, u):
+        for v in self.nbrs[u]:
+            if (
+                self._two_opt(u, v)
+                or self._cross_exchange(u, v)
+                or self._or_opt(u, v)
+                or self._swap(u, v)
+            ):
+                return True
+        return False
+
+    # 同一路线内的 2-opt：断开 (a, a') 和 (b, b')，接上 (a, b) 和 (a', b')，中间一段反转
+    def _two_opt(self, u, v):
+        r = self.route_of[u]
+        if self.route_of[v] != r:
+            return False
+        route = self.routes[r]
+        d = self.d
+        iu, iv = self.index[u], self.index[v]
+        # 两种情形：u、v 作为被断开边的前端，或者作为后端
+        for i, j in ((iu, iv), (iu - 1, iv - 1)):
+            if i > j:
+                i, j = j, i
+            if j - i < 2:
+                continue
+            a, a2, b, b2 = route[i], route[i + 1], route[j], route[j + 1]
+            delta = d[a][b] + d[a2][b2] - d[a][a2] - d[b][b2]
+            if delta < -1e-9 and self._fits(r, delta):
+                route[i + 1 : j + 1] = route[i + 1 : j + 1][::-1]
+                self._reindex(r, i + 1, j + 1)
+                self._wake(a, a2, b, b2)
+                self.moves["2-opt"] += 1
+                return True
+        return False
+
+    # 两条路线交换尾段（2-opt*）：u 之后与 v 之后的部分互换，或 u 起与 v 起的部分互换
+    def _cross_exchange(self, u, v):
+        ru, rv = self.route_of[u], self.route_of[v]
+        if ru == rv:
+            return False
+        A, B = self.routes[ru], self.routes[rv]
+        d = self.d
+        iu, iv = self.index[u], self.index[v]
+        for i, j in ((iu, iv), (iu - 1, iv - 1)):
+            # 新路线：A[:i+1] + B[j+1:] 与 B[:j+1] + A[i+1:]，都至少要保留一个目标
+            if i + 1 + len(B) - j - 1 < 3 or j + 1 + len(A) - i - 1 < 3:
+                continue
+            a, a2, b, b2 = A[i], A[i + 1], B[j], B[j + 1]
+            delta = d[a][b2] + d[b][a2] - d[a][a2] - d[b][b2]
+            if delta >= -1e-9:
+                continue
+            if self.max_length is not None:
+                # 交换后的路线长度 = 保留的前段 + 新连接边 + 换来的尾段，用前缀距离 O(1) 求出
+                pa, pb = self._prefix(ru), self._prefix(rv)
+                new_a = pa[i] + d[a][b2] + pb[-1] - pb[j + 1]
+                new_b = pb[j] + d[b][a2] + pa[-1] - pa[i + 1]
+                if max(new_a, new_b) > self.max_length + 1e-9:
+                    continue
+            self.routes[ru], self.routes[rv] = A[: i + 1] + B[j + 1 :], B[: j + 1] + A[i + 1 :]
+            self._reindex(ru, i + 1)
+            self._reindex(rv, j + 1)
+            self._wake(a, a2, b, b2)
+            self.moves["cross-exchange"] += 1
+            return True
+        return False
+
+    # Or-opt：把从 u 开始的 1~3 个连续目标挪到 v 之后，可正向也可反向插入；长度为1时即 relocate
+    def _or_opt(self, u, v):
+        ru, rv = self.route_of[u], self.route_of[v]
+        A = self.routes[ru]
+        d = self.d
+        iu = self.index[u]
+        for seg_len in (1, 2, 3):
+            end = iu + seg_len - 1
+            if end > len(A) - 2:
+                break
+            if ru != rv and seg_len == len(A) - 2:
+                break  # 不能把整条路线挪空
+            seg = A[iu : end + 1]
+            if v in seg:
+                break
+            p, nx = A[iu - 1], A[end + 1]
+            if v == p:
+                continue
+            B = self.routes[rv]
+            iv = self.index[v]
+            v2 = B[iv + 1]
+            s0, s1 = seg[0], seg[-1]
+            removal = d[p][s0] + d[s1][nx] - d[p][nx]
+            forward = d[v][s0] + d[s1][v2] - d[v][v2]
+            backward = d[v][s1] + d[s0][v2] - d[v][v2]
+            insert, reverse = (forward, False) if forward <= backward else (backward, True)
+            delta = insert - removal
+            if delta >= -1e-9:
+                continue
+            moved = seg[::-1] if reverse else seg
+            if ru == rv:
+                if not self._fits(ru, delta):
+                    continue
+                # 同一路线内只有被挪动段与插入位置之间的点下标会变
+                if iv > end:
+                    A[iu : iv + 1] = A[end + 1 : iv + 1] + moved
+                    self._reindex(ru, iu, iv + 1)
+                else:
+                    A[iv + 1 : end + 1] = moved + A[iv + 1 : iu]
+                    self._reindex(ru, iv + 1, end + 1)
+            else:
+                if self.max_length is not None:
+                    inner = self._prefix(ru)[end] - self._prefix(ru)[iu]
+                    if not (self._fits(ru, -removal - inner) and self._fits(rv, insert + inner)):
+                        continue
+                del A[iu : end + 1]
+                B[iv + 1 : iv + 1] = moved
+                self._reindex(ru, iu)
+                self._reindex(rv, iv + 1)
+            self._wake(p, nx, v, v2, s0, s1)
+            self.moves["relocate" if seg_len == 1 else "or-opt"] += 1
+            return True
+        return False
+
+    # 交换 u 与 v 的位置，两者相邻时不处理（等价于长度为1的 Or-opt）
+    def _swap(self, u, v):
+        ru, rv = self.route_of[u], self.route_of[v]
+        iu, iv = self.index[u], self.index[v]
+        if ru == rv and abs(iu - iv) < 2:
+            return False
+        A, B = self.routes[ru], self.routes[rv]
+        d = self.d
+        pu, nu = A[iu - 1], A[iu + 1]
+        pv, nv = B[iv - 1], B[iv + 1]
+        change_u = d[pu][v] + d[v][nu] - d[pu][u] - d[u][nu]
+        change_v = d[pv][u] + d[u][nv] - d[pv][v] - d[v][nv]
+        delta = change_u + change_v
+        if delta >= -1e-9:
+            return False
+        if ru == rv:
+            if not self._fits(ru, delta):
+                return False
+        elif not (self._fits(ru, change_u) and self._fits(rv, change_v)):
+            return False
+        A[iu], B[iv] = v, u
+        self._reindex(ru, iu, iu + 1)
+        self._reindex(rv, iv, iv + 1)
+        self._wake(pu, nu, pv, nv, u, v)
+        self.moves["swap"] += 1
+        return True
+
+
+# 入口：返回改进后的路线（下标列表）以及各类移动的执行次数；time_limit 含建表的时间
+def improve_routes(routes, distance_matrix, neighbors=10, max_length=None, time_limit=None):
+    start = time.perf_counter()
+    search = RouteLocalSearch(routes, distance_matrix, neighbors, max_length)
+    search.run(time_limit, start)
+    return search.routes, search.moves
@@ -0,0 +1,77 @@
+import math
+import numpy as np
+
+# 规划分辨率下的障碍物占据图，供 T2.py 的网格 A* 与 D* Lite 使用
+# 障碍物半径事先加上安全距离，栅格化成布尔位图，碰撞检测变成一次数组查表，与障碍物个数无关
+# 网格结点坐标为 起点 + k·resolution，起点不同余时结点落在不同的格点上，
+# 所以按 (x mod resolution, y mod resolution) 各建一层位图，第一次用到时才栅格化
+# 新增障碍物时只把这一个障碍物画进已有的各层
+
+
+class OccupancyGrid:
+    """bounds=(x_min, x_max, y_min, y_max)，结点与障碍物圆心距离小于 半径+margin 即为占据"""
+
+    def __init__(self, bounds, resolution, margin=0.0, obstacles=()):
+        self.bounds = bounds
+        self.resolution = resolution
+        self.margin = margin
+        self.obstacles = []
+        self._layers = {}
+        for obstacle in obstacles:
+            self.add_obstacle(obstacle)
+
+    # 与 (x, y) 同余的那层：(x0, y0, 位图)，位图 [i, j] 对应结点 (x0 + i·resolution, y0 + j·resolution)
+    def layer(self, x, y):
+        res = self.resolution
+        phase = (x % res, y % res)
+        layer = self._layers.get(phase)
+        if layer is None:
+            x_min, x_max, y_min, y_max = self.bounds
+            # 该相位下范围内的第一个格点
+            x0 = phase[0] + res * math.ceil((x_min - phase[0]) / res)
+            y0 = phase[1] + res * math.ceil((y_min - phase[1]) / res)
+            nx = max(math.floor((x_max - x0) / res) + 1, 0)
+            ny = max(math.floor((y_max - y0) / res) + 1, 0)
+            layer = (x0, y0, np.zeros((nx, ny), dtype=bool))
+            for obstacle in self.obstacles:
+                self._rasterize(layer, obstacle)
+            self._layers[phase] = layer
+        return layer
+
+    # 只在障碍物外接正方形覆盖的格点上算距离
+    def _rasterize(self, layer, obstacle):
+        x0, y0, grid = layer
+        ox, oy, radius = obstacle
+        reach = radius + self.margin
+        res = self.resolution
+        i0 = max(math.ceil((ox - reach - x0) / res), 0)
+        i1 = min(math.floor((ox + reach - x0) / res) + 1, grid.shape[0])
+        j0 = max(math.ceil((oy - reach - y0) / res), 0)
+        j1 = min(math.floor((oy + reach - y0) / res) + 1, grid.shape[1])
+        if i0 >= i1 or j0 >= j1:
+            return
+        xs = x0 + np.arange(i0, i1) * res
+        ys = y0 + np.arange(j0, j1) * res
+        dist = np.sqrt((xs[:, None] - ox) ** 2 + (ys[None, :] - oy) ** 2)
+        grid[i0:i1, j0:j1] |= dist < reach
+
+    def add_obstacle(self, obstacle):
+        self.obstacles.append(obstacle)
+        for layer in self._layers.values():
+            self._rasterize(layer, obstacle)
+
+    # 格点 (x, y) 是否被占据，范围外视为占据
+    def blocked(self, x, y):
+        x0, y0, grid = self.layer(x, y)
+        i = round((x - x0) / self.resolution)
+        j = round((y - y0) / self.resolution)
+        if not (0 <= i < grid.shape[0] and 0 <= j < grid.shape[1]):
+            return True
+        return bool(grid[i, j])
+
+    # 以 (sx, sy) 为原点、下标 ix_min..ix_max × iy_min..iy_max 的一块位图（需在范围内）
+    def window(self, sx, sy, ix_min, ix_max, iy_min, iy_max):
+        x0, y0, grid = self.layer(sx, sy)
+        di = round((sx - x0) / self.resolution)
+        dj = round((sy - y0) / self.resolution)
+        return grid[ix_min + di: ix_max + di + 1, iy_min + dj: iy_max + dj + 1]
@@ -0,0 +1,264 @@
+import numpy as np
+
+# 节约算法的合并引擎，T1.py 与 T1_constraint.py 的 clarke_wright_savings 共用
+# 路线用链表表示：nxt 记录每个目标点的后继，head/tail 记录每条路线的两个端点，
+# route_of 记录目标点所在路线，合并时只改端点指针并把较短路线的点改挂到较长路线上
+# 节约值的来源是一个生成器，按 (节约值降序, 点对组合顺序升序) 分批交出排好序的 (saving, i, j) 数组
+
+
+# 按节约值从大到小分批给出 (saving, i, j) 数组，节约值相同时按 (i, j) 的组合顺序
+# 不一次性排序全部 n²/2 个点对：每次分块扫描距离矩阵取出下一批最大的 batch 个，
+# 排好序再交出去；合并凑够路线数后后面的点对就不用再排了。每批之后批量翻倍
+def iter_savings(distance_matrix, depot_index, batch=None, block=1024):
+    distance_matrix = np.asarray(distance_matrix)
+    n = len(distance_matrix)
+    targets = np.array([idx for idx in range(n) if idx != depot_index], dtype=np.int64)
+    k = len(targets)
+    if k < 2:
+        return
+    depot_dist = distance_matrix[depot_index][targets]
+    batch = batch or 16 * k
+    upper = np.inf
+
+    def scan(lower):
+        # 扫描所有 lower <= saving < upper 的点对，lower 为 None 时只保留最大的 batch 个
+        values, keys = [], []
+        for start in range(0, k, block):
+            rows = np.arange(start, min(start + block, k))
+            sub = distance_matrix[targets[rows][:, None], targets[None, :]]
+            saving = depot_dist[rows][:, None] + depot_dist[None, :] - sub
+            keep = (np.arange(k)[None, :] > rows[:, None]) & (saving < upper)
+            if lower is not None:
+                keep &= saving >= lower
+            r, c = np.nonzero(keep)
+            values.append(saving[r, c])
+            keys.append(rows[r] * k + c)
+            if lower is None and sum(len(v) for v in values) > 2 * batch:
+                merged = np.concatenate(values)
+                merged_keys = np.concatenate(keys)
+                top = np.argpartition(-merged, batch)[:batch]
+                values, keys = [merged[top]], [merged_keys[top]]
+        return np.concatenate(values), np.concatenate(keys)
+
+    while True:
+        values, _ = scan(None)
+        if len(values) == 0:
+            return
+        # 先定出本批的门槛值，再把所有不小于门槛的点对（含并列）一起取出，保证并列时顺序不乱
+        lower = values.min() if len(values) <= batch else -np.partition(-values, batch - 1)[batch - 1]
+        values, keys = scan(lower)
+        order = np.lexsort((keys, -values))
+        yield values[order], targets[keys[order] // k], targets[keys[order] % k]
+        upper = lower
+        batch *= 2
+
+
+# 只给出会被合并采纳的那些节约值：原规则下点对只要分属两条路线就合并，
+# 因此被采纳的点对恰好是“节约值最大生成树”的边（Kruskal），按同样的全序排好即可。
+# 用 Prim 按行向量化求这棵树，O(n²) 且不用对 n²/2 个点对排序；并列时与全量排序的顺序一致
+def spanning_savings(distance_matrix, depot_index):
+    distance_matrix = np.asarray(distance_matrix)
+    n = len(distance_matrix)
+    targets = np.array([idx for idx in range(n) if idx != depot_index], dtype=np.int64)
+    k = len(targets)
+    if k < 2:
+        return
+    depot_dist = distance_matrix[depot_index][targets]
+    positions = np.arange(k)
+
+    def row(u):
+        saving = depot_dist[u] + depot_dist - distance_matrix[targets[u]][targets]
+        key = np.minimum(positions, u) * k + np.maximum(positions, u)
+        return saving, key
+
+    in_tree = np.zeros(k, dtype=bool)
+    in_tree[0] = True
+    best, best_key = row(0)
+    values = np.empty(k - 1, dtype=best.dtype)
+    keys = np.empty(k - 1, dtype=np.int64)
+    for step in range(k - 1):
+        candidate = np.where(in_tree, -np.inf, best)
+        top = candidate.max()
+        tied = np.nonzero(candidate == top)[0]
+        u = tied[np.argmin(best_key[tied])]
+        values[step] = best[u]
+        keys[step] = best_key[u]
+        in_tree[u] = True
+        saving, key = row(u)
+        better = (saving > best) | ((saving == best) & (key < best_key))
+        best = np.where(better, saving, best)
+        best_key = np.where(better, key, best_key)
+    order = np.lexsort((keys, -values))
+    yield values[order], targets[keys[order] // k], targets[keys[order] % k]
+
+
+# 网格索引上的 k 近邻：格子边长取成平均每格约 k 个点，逐格取出周围 r 圈格子里的候选点求距离；
+# 第 k 近的距离超过 r 个格子宽时说明圈外可能还有更近的点，再扩一圈，因此结果是精确的 k 近邻
+def grid_neighbors(coords, k):
+    n = len(coords)
+    k = min(k, n - 1)
+    if k <= 0:
+        return np.empty((n, 0), dtype=np.int64)
+    low = coords.min(axis=0)
+    span = np.maximum(coords.max(axis=0) - low, 1e-9)
+    cell = max(float(np.sqrt(span[0] * span[1] * k / n)), float(span.max()) / 4096, 1e-9)
+    cx = ((coords[:, 0] - low[0]) // cell).astype(np.int64)
+    cy = ((coords[:, 1] - low[1]) // cell).astype(np.int64)
+    width = int(cx.max()) + 1
+    cell_id = cy * width + cx
+    order = np.argsort(cell_id, kind="stable")
+    ids, starts, counts = np.unique(cell_id[order], return_index=True, return_counts=True)
+    members_of = {int(c): order[st : st + cnt] for c, st, cnt in zip(ids, starts, counts)}
+    height = int(cy.max()) + 1
+
+    neighbors = np.empty((n, k), dtype=np.int64)
+    for c, members in members_of.items():
+        gx, gy = c % width, c // width
+        r = 1
+        while True:
+            cands = [
+                members_of[yy * width + xx]
+                for yy in range(max(gy - r, 0), min(gy + r, height - 1) + 1)
+                for xx in range(max(gx - r, 0), min(gx + r, width - 1) + 1)
+                if yy * width + xx in members_of
+            ]
+            cands = np.concatenate(cands)
+            if len(cands) > k:
+                diff = coords[members][:, None, :] - coords[cands][None, :, :]
+                dist = np.sqrt((diff ** 2).sum(axis=2))
+                dist[members[:, None] == cands[None, :]] = np.inf
+                nearest = np.argpartition(dist, k - 1, axis=1)[:, :k]
+                kth = np.take_along_axis(dist, nearest, axis=1).max()
+                if kth <= r * cell or r >= max(width, height):
+                    neighbors[members] = cands[nearest]
+                    break
+            r += 1
+    return neighbors
+
+
+# 稀疏节约值：只对每个目标与它的 k 个最近邻组成的点对计算节约值，
+# 直接用坐标计算，不需要 n×n 距离矩阵，内存和排序量都是 O(nk)
+def knn_savings(coords, depot_index, k):
+    coords = np.asarray(coords, dtype=float)
+    n = len(coords)
+    targets = np.array([idx for idx in range(n) if idx != depot_index], dtype=np.int64)
+    m = len(targets)
+    if m < 2:
+        return
+    pts = coords[targets]
+    neighbors = grid_neighbors(pts, k)
+    rows = np.repeat(np.arange(m), neighbors.shape[1])
+    cols = neighbors.ravel()
+    keys = np.unique(np.minimum(rows, cols) * m + np.maximum(rows, cols))
+    a, b = keys // m, keys % m
+    depot = coords[depot_index]
+    depot_dist = np.sqrt(((pts - depot) ** 2).sum(axis=1))
+    pair_dist = np.sqrt(((pts[a] - pts[b]) ** 2).sum(axis=1))
+    values = depot_dist[a] + depot_dist[b] - pair_dist
+    order = np.lexsort((keys, -values))
+    yield values[order], targets[a[order]], targets[b[order]]
+
+
+# 依次消费节约值合并路线，直到路线数降到 num_vehicles
+# 合并规则与原实现一致：i、j 分属两条路线时，把 j 所在路线接在 i 所在路线之后；
+# 返回的路线顺序也与原实现的 remove/append 顺序一致
+# savings 为节约值来源：spanning_savings 或 iter_savings 与原实现结果完全相同，knn_savings 为稀疏近似；
+# 稀疏节约值用完后路线仍多于 num_vehicles 时，若给了 coords，再用各路线端点之间的节约值把剩下的路线接起来
+# 约束：max_length 为单条路线长度上限（续航），capacity 为单机载荷上限、demands[idx] 为各点需求（默认都为1）；
+# 每条路线缓存总长和总载荷，合并后的值由两条路线的缓存加上端点处的三条边 O(1) 算出，超限的合并直接跳过。
+# 有约束时被跳过的点对会破坏生成树性质，节约值来源须用完整排序的 iter_savings
+def merge_routes(num_locations, depot_index, num_vehicles, savings, coords=None,
+                 max_length=None, capacity=None, demands=None, distance_matrix=None):
+    n = num_locations
+    targets = [idx for idx in range(n) if idx != depot_index]
+    dist = pts = None
+    if max_length is not None:
+        if distance_matrix is not None:
+            dist = np.asarray(distance_matrix)
+        elif coords is not None:
+            pts = np.asarray(coords, dtype=float)
+        else:
+            raise ValueError("限制路线长度时需要提供 distance_matrix 或 coords")
+
+    def leg(a, b):
+        if dist is not None:
+            return float(dist[a, b])
+        return float(np.sqrt(((pts[a] - pts[b]) ** 2).sum()))
+
+    nxt = [-1] * n
+    owner = [0] * n
+    head, tail, size, stamp, length, load = {}, {}, {}, {}, {}, {}
+    for rid, node in enumerate(targets):
+        owner[node] = rid
+        head[rid] = tail[rid] = node
+        size[rid] = 1
+        stamp[rid] = rid
+        if max_length is not None:
+            length[rid] = 2 * leg(depot_index, node)
+        if capacity is not None:
+            load[rid] = 1 if demands is None else demands[node]
+    state = {"count": len(targets), "stamp": len(targets)}
+
+    def consume(batches):
+        for _, first, second in batches:
+            if state["count"] <= num_vehicles:
+                return
+            # 批内先向量化去掉两端已在同一路线上的点对，剩下的再逐个判断
+            route_of = np.array(owner, dtype=np.int64)
+            cross = route_of[first] != route_of[second]
+            for i, j in zip(first[cross].tolist(), second[cross].tolist()):
+                ri = owner[i]
+                rj = owner[j]
+                if ri == rj:
+                    continue
+                if capacity is not None:
+                    merged_load = load[ri] + load[rj]
+                    if merged_load > capacity:
+                        continue
+                if max_length is not None:
+                    # j 所在路线接在 i 所在路线之后：去掉 i 尾与 j 首各自到基地的边，连上 i 尾到 j 首
+                    t, h = tail[ri], head[rj]
+                    merged_length = (length[ri] + length[rj] + leg(t, h)
+                                     - leg(t, depot_index) - leg(depot_index, h))
+                    if merged_length > max_length:
+                        continue
+                # 保留较长路线的编号，只把较短路线上的点改挂过去
+                keep, drop = (ri, rj) if size[ri] >= size[rj] else (rj, ri)
+                node = head[drop]
+                while node != -1:
+                    owner[node] = keep
+                    node = nxt[node]
+                nxt[tail[ri]] = head[rj]
+                new_head, new_tail = head[ri], tail[rj]
+                head[keep], tail[keep] = new_head, new_tail
+                size[keep] = size[ri] + size[rj]
+                stamp[keep] = state["stamp"]
+                state["stamp"] += 1
+                if capacity is not None:
+                    load[keep] = merged_load
+                if max_length is not None:
+                    length[keep] = merged_length
+                for table in (head, tail, size, stamp, length, load):
+                    table.pop(drop, None)
+                state["count"] -= 1
+                if state["count"] <= num_vehicles:
+                    return
+
+    if state["count"] > num_vehicles:
+        consume(savings)
+    if state["count"] > num_vehicles and coords is not None:
+        ends = np.array(sorted(set(head.values()) | set(tail.values())), dtype=np.int64)
+        sub = np.asarray(coords, dtype=float)[np.append(ends, depot_index)]
+        pairs = knn_savings(sub, len(ends), len(ends) - 1)
+        consume((values, ends[a], ends[b]) for values, a, b in pairs)
+
+    routes = []
+    for rid in sorted(stamp, key=stamp.get):
+        route = [depot_index]
+        node = head[rid]
+        while node != -1:
+            route.append(node)
+            node = nxt[node]
+        route.append(depot_index)
+        routes.append(route)
+    return routes
@@ -0,0 +1,134 @@
+import math
+import heapq
+import numpy as np
+from repo_modules import profiler
+from visibility import TangentGraph, segments_blocked
+
+# 圆形障碍物下的精确最短路规划，可替代网格 A*
+# 切线可见图（见 visibility.py）：公切线切点之间的切线段、同一圆上相邻切点之间的圆弧，
+# 再加上起点、终点到各圆的切线，总共几十个结点，在上面用 A*（直线距离作启发）求最短路
+# 返回的路径点与 a_star 一样是坐标列表 [start, ..., goal]；圆弧用外切折线表示，
+# 每段折线都与圆相切，所以整条折线不进入任何圆，长度比精确弧长略长（arc_step=10° 时圆弧部分约长 0.25%）
+
+_EPS = 1e-7
+
+
+# 外切折线：从圆 i 上角度 angle 处沿圆周转 sweep（逆时针为正）的拐点和终点
+def _arc_points(center, radius, angle, sweep, arc_step):
+    if abs(sweep) < _EPS:
+        return []
+    m = max(1, math.ceil(abs(sweep) / arc_step))
+    delta = sweep / m
+    outer = radius / math.cos(delta / 2)
+    points = []
+    for k in range(m):
+        theta = angle + (k + 0.5) * delta
+        points.append((float(center[0] + outer * math.cos(theta)), float(center[1] + outer * math.sin(theta))))
+    theta = angle + sweep
+    points.append((float(center[0] + radius * math.cos(theta)), float(center[1] + radius * math.sin(theta))))
+    return points
+
+
+# obstacles 为 [(x, y, radius)]，margin 为安全距离；
+# 起点落在某个圆内（如刚起飞时离其他无人机不到安全距离）时该圆不参与避让，终点落在圆内时返回 None
+def tangent_path(start, goal, obstacles, margin=0.0, arc_step=math.radians(10)):
+    if profiler.enabled:
+        profiler.count("tangent_path.queries")
+    circles = [(x, y, r + margin) for x, y, r in obstacles]
+    circles = [(x, y, r) for x, y, r in circles
+               if math.hypot(start[0] - x, start[1] - y) >= r * (1 - _EPS)]
+    if any(math.hypot(goal[0] - x, goal[1] - y) < r * (1 - _EPS) for x, y, r in circles):
+        return None
+    centers = np.array([(x, y) for x, y, _ in circles], dtype=float).reshape(-1, 2)
+    radii = np.array([r for _, _, r in circles], dtype=float)
+    ends = np.array([start, goal], dtype=float)
+    if not segments_blocked(ends[:1], ends[1:], centers, radii)[0]:
+        return [start, goal]
+
+    graph = TangentGraph(centers, radii)
+
+    # 起点、终点向各圆作两条切线，切点不在其他圆内且切线段不被挡住时连边
+    candidates = []
+    for e, (px, py) in enumerate(ends):
+        for i, ((cx, cy), r) in enumerate(zip(centers, radii)):
+            d = math.hypot(px - cx, py - cy)
+            phi = math.atan2(py - cy, px - cx)
+            alpha = math.acos(min(r / d, 1.0))
+            length = math.sqrt(max(d * d - r * r, 0.0))
+            for theta in (phi + alpha, phi - alpha):
+                if not graph.is_blocked(i, theta):
+                    candidates.append((e, i, theta, length))
+    links = []
+    if candidates:
+        touch = np.array([graph.on_circle(i, theta) for _, i, theta, _ in candidates])
+        hidden = segments_blocked(ends[[e for e, _, _, _ in candidates]], touch, centers, radii)
+        for (e, i, theta, length), hide in zip(candidates, hidden):
+            if not hide:
+                links.append((e, graph.node(i, theta), length))
+
+    # 邻接表：(邻点, 长度, 圆弧 (圆, 起始角, 转角) 或 None)；起点、终点编号排在切点之后
+    _, arcs = graph.arcs()
+    size = len(graph.node_circle)
+    source, target = size, size + 1
+    adjacency = [[] for _ in range(size + 2)]
+    for a, b, length in graph.edges:
+        adjacency[a].append((b, length, None))
+        adjacency[b].append((a, length, None))
+    for k1, k2, length, i, angle, sweep in arcs:
+        adjacency[k1].append((k2, length, (i, angle, sweep)))
+        adjacency[k2].append((k1, length, (i, angle + sweep, -sweep)))
+    for e, k, length in links:
+        if e == 0:
+            adjacency[source].append((k, length, None))
+        else:
+            adjacency[k].append((target, length, None))
+
+    coords = [graph.on_circle(graph.node_circle[k], graph.node_angle[k]) for k in range(size)]
+    coords += [ends[0], ends[1]]
+    gx, gy = goal
+
+    def heuristic(k):
+        return math.hypot(coords[k][0] - gx, coords[k][1] - gy)
+
+    best = [math.inf] * (size + 2)
+    parent = [None] * (size + 2)
+    closed = [False] * (size + 2)
+    best[source] = 0.0
+    open_set = [(heuristic(source), 0.0, source)]
+    expansions = 0
+    while open_set:
+        _, g, u = heapq.heappop(open_set)
+        if closed[u]:
+            continue
+        closed[u] = True
+        expansions += 1
+        if u == target:
+            break
+        for v, length, arc in adjacency[u]:
+            new_g = g + length
+            if new_g < best[v]:
+                best[v] = new_g
+                parent[v] = (u, arc)
+                heapq.heappush(open_set, (new_g + heuristic(v), new_g, v))
+    if profiler.enabled:
+        profiler.count("tangent_path.nodes", size)
+        profiler.count("tangent_path.expansions", expansions)
+    if not closed[target]:
+        return None
+
+    steps = []
+    node = target
+    while node != source:
+        prev, arc = parent[node]
+        steps.append((node, arc))
+        node = prev
+    path = [start]
+    for node, arc in reversed(steps):
+        if node == target:
+            path.append(goal)
+        elif arc is None:
+            path.append((float(coords[node][0]), float(coords[node][1])))
+        else:
+            i, angle, sweep = arc
+            path.extend(_arc_points(centers[i], radii[i], angle, sweep, arc_step))
+    return path
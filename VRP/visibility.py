@@ -0,0 +1,432 @@
+import math
+import heapq
+from bisect import bisect_right
+from collections import OrderedDict
+import numpy as np
+from distance_matrix import instance_items, CACHE_BYTES
+
+# 障碍物感知的距离矩阵：目标点、基地之间绕开圆形障碍物的最短路长度
+# 绕圆障碍的最短路只由两种线段组成：与圆相切的直线段、沿圆周的圆弧（切线可见图）。
+#   - 核心结点：两圆之间公切线的切点，核心结点之间用 Dijkstra 求出两两最短路
+#   - 每个查询点向各圆作两条切线，沿圆弧走到同一段圆弧两端的核心结点，作为“出口”
+#   - 以一个点的全部出口为多源做 Dijkstra，等价于出口代价加上核心结点间的最短路再取最小，
+#     这一步对所有点一起向量化；再与直线可见、同一段圆弧上直接相接两种情况取最小
+# 障碍物格式与 T2.py 相同：(x, y, radius)，margin 为额外的安全距离
+
+_EPS = 1e-7
+_TWO_PI = 2 * math.pi
+
+
+# 线段 a[k]-b[k] 是否穿过任一圆的内部（与圆相切不算），a、b 形状 (N, 2)
+def segments_blocked(a, b, centers, radii, chunk=100000):
+    blocked = np.zeros(len(a), dtype=bool)
+    if len(radii) == 0:
+        return blocked
+    limit = (radii * (1 - _EPS) - _EPS)[None] ** 2
+    cx, cy = centers[None, :, 0], centers[None, :, 1]
+    for start in range(0, len(a), chunk):
+        ax, ay = a[start:start + chunk, 0, None], a[start:start + chunk, 1, None]
+        dx, dy = b[start:start + chunk, 0, None] - ax, b[start:start + chunk, 1, None] - ay
+        fx, fy = cx - ax, cy - ay
+        length2 = dx * dx + dy * dy
+        t = np.clip((fx * dx + fy * dy) / np.where(length2 > 0, length2, 1.0), 0.0, 1.0)
+        fx -= t * dx
+        fy -= t * dy
+        blocked[start:start + chunk] = (fx * fx + fy * fy < limit).any(axis=1)
+    return blocked
+
+
+class TangentGraph:
+    """若干圆之间的切线可见图：结点是圆上的切点，边是不穿过任何圆的公切线段与沿圆周的圆弧"""
+
+    def __init__(self, centers, radii):
+        self.centers, self.radii = centers, radii
+        n_circles = len(radii)
+
+        # 每个圆被其他圆盖住的角度区间 (中心角, 半宽)；整个圆落在另一个圆里时标记为 full
+        self.full = [False] * n_circles
+        self.blocked = [[] for _ in range(n_circles)]
+        for i in range(n_circles):
+            for j in range(n_circles):
+                if i != j:
+                    self._cover(i, j)
+
+        # 核心结点：两两圆之间的公切线
+        self.node_of = {}
+        self.node_circle, self.node_angle = [], []
+        self.edges = []
+        self._connect([c for i in range(n_circles) for j in range(i + 1, n_circles) for c in self._tangents(i, j)])
+
+    # 记录圆 j 盖住圆 i 的部分
+    def _cover(self, i, j):
+        centers, radii = self.centers, self.radii
+        d = float(np.hypot(*(centers[j] - centers[i])))
+        ri, rj = radii[i], radii[j]
+        if d + ri <= rj:
+            self.full[i] = True
+        elif d < ri + rj and d + rj > ri:
+            cos_a = (d * d + ri * ri - rj * rj) / (2 * d * ri)
+            self.blocked[i].append((math.atan2(*(centers[j] - centers[i])[::-1]),
+                                    math.acos(min(max(cos_a, -1.0), 1.0))))
+
+    # 圆 i、j 的公切线（外公切线 2 条，两圆分离时再加内公切线 2 条）：(i, 切点角, j, 切点角, 长度)
+    def _tangents(self, i, j):
+        if self.full[i] or self.full[j]:
+            return []
+        dx, dy = self.centers[j] - self.centers[i]
+        d = math.hypot(dx, dy)
+        phi = math.atan2(dy, dx)
+        ri, rj = self.radii[i], self.radii[j]
+        candidates = []
+        if d > abs(ri - rj):
+            beta = math.acos((ri - rj) / d)
+            length = math.sqrt(max(d * d - (ri - rj) ** 2, 0.0))
+            for sign in (1, -1):
+                candidates.append((i, phi + sign * beta, j, phi + sign * beta, length))
+        if d > ri + rj:
+            beta = math.acos((ri + rj) / d)
+            length = math.sqrt(d * d - (ri + rj) ** 2)
+            for sign in (1, -1):
+                candidates.append((i, phi + sign * beta, j, phi + sign * beta + math.pi, length))
+        return candidates
+
+    # 不穿过任何圆、两端切点都没被盖住的公切线加为边
+    def _connect(self, candidates):
+        if not candidates:
+            return
+        ends_a = np.array([self.on_circle(i, ti) for i, ti, _, _, _ in candidates])
+        ends_b = np.array([self.on_circle(j, tj) for _, _, j, tj, _ in candidates])
+        hidden = segments_blocked(ends_a, ends_b, self.centers, self.radii)
+        for (i, ti, j, tj, length), hide in zip(candidates, hidden):
+            if hide or self.is_blocked(i, ti) or self.is_blocked(j, tj):
+                continue
+            self.edges.append((self.node(i, ti), self.node(j, tj), length))
+
+    # 加入一个圆：原有的边只需检查是否穿过新圆、端点是否被它盖住，再补上新圆与各圆的公切线；
+    # 被盖住的结点不再有边，也不参与圆弧（见 arcs），编号保持不变
+    def add_circle(self, center, radius):
+        c = len(self.radii)
+        self.centers = np.vstack([self.centers, np.asarray(center, dtype=float).reshape(1, 2)])
+        self.radii = np.append(self.radii, float(radius))
+        self.full.append(False)
+        self.blocked.append([])
+        for i in range(c):
+            self._cover(i, c)
+            self._cover(c, i)
+        if self.edges:
+            ends_a = np.array([self.node_point(a) for a, _, _ in self.edges])
+            ends_b = np.array([self.node_point(b) for _, b, _ in self.edges])
+            hidden = segments_blocked(ends_a, ends_b, self.centers[c:], self.radii[c:])
+            self.edges = [(a, b, length) for (a, b, length), hide in zip(self.edges, hidden)
+                          if not hide and self.alive(a) and self.alive(b)]
+        self._connect([t for i in range(c) for t in self._tangents(i, c)])
+
+    def copy(self):
+        graph = TangentGraph.__new__(TangentGraph)
+        graph.centers, graph.radii = self.centers, self.radii
+        graph.full = list(self.full)
+        graph.blocked = [list(intervals) for intervals in self.blocked]
+        graph.node_of = dict(self.node_of)
+        graph.node_circle, graph.node_angle = list(self.node_circle), list(self.node_angle)
+        graph.edges = list(self.edges)
+        return graph
+
+    # 圆 i 上角度 theta 处是否落在其他圆内
+    def is_blocked(self, i, theta):
+        if self.full[i]:
+            return True
+        return any(abs((theta - gamma + math.pi) % _TWO_PI - math.pi) < alpha - _EPS
+                   for gamma, alpha in self.blocked[i])
+
+    def on_circle(self, i, theta):
+        return self.centers[i] + self.radii[i] * np.array([math.cos(theta), math.sin(theta)])
+
+    def node_point(self, k):
+        return self.on_circle(self.node_circle[k], self.node_angle[k])
+
+    def alive(self, k):
+        return not self.is_blocked(self.node_circle[k], self.node_angle[k])
+
+    # 圆 i 上角度 theta 处的结点编号，同一位置只建一个
+    def node(self, i, theta):
+        key = (i, round(theta % _TWO_PI, 12))
+        if key not in self.node_of:
+            self.node_of[key] = len(self.node_circle)
+            self.node_circle.append(i)
+            self.node_angle.append(theta % _TWO_PI)
+        return self.node_of[key]
+
+    # 每个圆上的“边界”：结点和被盖住区间的端点，按角度排序；
+    # 相邻两个边界都是结点时，它们之间的圆弧可走，记为 (k1, k2, 弧长, 圆, k1 的角度, 逆时针转角)
+    def arcs(self):
+        radii = self.radii
+        items_of = [[] for _ in range(len(radii))]
+        for k, (i, angle) in enumerate(zip(self.node_circle, self.node_angle)):
+            if not self.is_blocked(i, angle):
+                items_of[i].append((angle, k))
+        bounds, arcs = [], []
+        for i, items in enumerate(items_of):
+            for gamma, alpha in self.blocked[i]:
+                items += [((gamma - alpha) % _TWO_PI, -1), ((gamma + alpha) % _TWO_PI, -1)]
+            items.sort()
+            bounds.append(([angle for angle, _ in items], [k for _, k in items]))
+            if len(items) > 1:
+                for q in range(len(items)):
+                    (a1, k1), (a2, k2) = items[q], items[(q + 1) % len(items)]
+                    if k1 >= 0 and k2 >= 0 and not self.full[i]:
+                        sweep = (a2 - a1) % _TWO_PI
+                        arcs.append((k1, k2, radii[i] * sweep, i, a1, sweep))
+        return bounds, arcs
+
+
+# 单源 Dijkstra，结果写进 row（初值为 inf）；给定 targets 时这些结点都出堆后就停止，其余位置不一定是最终值
+def _dijkstra(adjacency, source, row, targets=None):
+    row[source] = 0.0
+    heap = [(0.0, source)]
+    pending = None if targets is None else set(targets)
+    while heap:
+        d, u = heapq.heappop(heap)
+        if d > row[u]:
+            continue
+        if pending is not None:
+            pending.discard(u)
+            if not pending:
+                break
+        for v, w in adjacency[u]:
+            if d + w < row[v]:
+                row[v] = d + w
+                heapq.heappush(heap, (d + w, v))
+
+
+class VisibilityDistance:
+    """一组点在一组圆形障碍物下的全点对最短距离，可增量加入障碍物"""
+
+    def __init__(self, points, obstacles=(), margin=0.0):
+        self.locations = list(points)
+        self.coords = np.array(list(points.values()), dtype=float).reshape(-1, 2)
+        self.margin = margin
+        self.obstacles = list(obstacles)
+        self._build()
+        # 直线是否被挡只需检查上三角，结果再与转置取小
+        n = len(self.coords)
+        matrix = self._rows(np.arange(n), np.triu(np.ones((n, n), dtype=bool), 1))
+        self.matrix = np.minimum(matrix, matrix.T)
+
+    # 新增一个障碍物，只重算最短路可能碰到它的那些点对：
+    # 长度为 d(s,t) 的路径都在以 s、t 为焦点的椭圆 |sx|+|xt| <= d(s,t) 内，
+    # 圆与椭圆不相交时原最短路仍然可行，而经过新圆的路径（包括新加的公切线）都不短于椭圆的长轴，
+    # 所以原值仍是最优；核心结点之间的最短路按同样的判据只重算受影响的源点
+    # 目标点落在新障碍物内时抛出 ValueError，状态保持不变
+    def add_obstacle(self, obstacle):
+        cx, cy, r = obstacle
+        r += self.margin
+        to_center = np.hypot(self.coords[:, 0] - cx, self.coords[:, 1] - cy)
+        self._check_inside(to_center[:, None], np.array([r]))
+
+        self.obstacles.append(obstacle)
+        graph = self.graph
+        old_size = len(graph.node_circle)
+        old_points = np.array([graph.node_point(k) for k in range(old_size)]).reshape(-1, 2)
+        graph.add_circle((cx, cy), r)
+        self.centers, self.radii = graph.centers, graph.radii
+        self.bounds, arcs = graph.arcs()
+
+        size = len(graph.node_circle)
+        adjacency = self._adjacency(graph, arcs)
+        core = np.full((size, size), np.inf)
+        core[:old_size, :old_size] = self.core
+        # 新结点整行重算；被盖住的结点不再连通，除自身外都是 inf
+        for source in range(old_size, size):
+            _dijkstra(adjacency, source, core[source])
+        core[:old_size, old_size:] = core[old_size:, :old_size].T
+        for k in range(old_size):
+            if not graph.alive(k):
+                core[k, :] = core[:, k] = np.inf
+                core[k, k] = 0.0
+        # 旧结点之间按椭圆判据找出可能变化的结点对；无向图只需从每对的一端算，
+        # 先处理涉及结点对最多的源点，每次 Dijkstra 在它的目标都出堆后就停
+        gap = np.hypot(old_points[:, 0] - cx, old_points[:, 1] - cy) - r
+        stale = gap[:, None] + gap[None, :] < self.core + _EPS
+        np.fill_diagonal(stale, False)
+        dead = [k for k in range(old_size) if not graph.alive(k)]
+        stale[dead, :] = stale[:, dead] = False
+        row = np.empty(size)
+        for source in np.argsort(-stale.sum(axis=1), kind='stable').tolist():
+            targets = np.nonzero(stale[source])[0]
+            if not len(targets):
+                continue
+            row.fill(np.inf)
+            _dijkstra(adjacency, source, row, targets.tolist())
+            core[source, targets] = core[targets, source] = row[targets]
+            stale[targets, source] = False
+        self.core = core
+        self._exits()
+
+        affected = to_center[:, None] + to_center[None, :] - 2 * r < self.matrix + _EPS
+        np.fill_diagonal(affected, False)
+        rows = np.nonzero(affected.any(axis=1))[0]
+        if len(rows):
+            fresh = self._rows(rows, affected[rows])
+            self.matrix[rows] = np.where(affected[rows], fresh, self.matrix[rows])
+        return len(rows)
+
+    # gap 为 (点数, 圆数) 的点到圆心距离
+    def _check_inside(self, gap, radii):
+        inside = np.nonzero((gap < radii[None] * (1 - _EPS)).any(axis=1))[0]
+        if len(inside):
+            names = ', '.join(self.locations[idx] for idx in inside)
+            raise ValueError(f"目标点 {names} 位于障碍物（含安全距离）内，无法到达")
+
+    @staticmethod
+    def _adjacency(graph, arcs):
+        adjacency = [[] for _ in range(len(graph.node_circle))]
+        for a, b, w in graph.edges + [(k1, k2, length) for k1, k2, length, _, _, _ in arcs]:
+            adjacency[a].append((b, w))
+            adjacency[b].append((a, w))
+        return adjacency
+
+    def _build(self):
+        coords = self.coords
+        centers = np.array([(x, y) for x, y, _ in self.obstacles], dtype=float).reshape(-1, 2)
+        radii = np.array([r for _, _, r in self.obstacles], dtype=float) + self.margin
+        if len(radii):
+            self._check_inside(np.hypot(coords[:, None, 0] - centers[None, :, 0],
+                                        coords[:, None, 1] - centers[None, :, 1]), radii)
+        graph = self.graph = TangentGraph(centers, radii)
+        self.centers, self.radii = centers, radii
+        self.bounds, arcs = graph.arcs()
+
+        # 核心结点两两最短路
+        adjacency = self._adjacency(graph, arcs)
+        size = len(adjacency)
+        core = np.full((size, size), np.inf)
+        for source in range(size):
+            _dijkstra(adjacency, source, core[source])
+        self.core = core
+        self._exits()
+
+    # 查询点的出口：到各圆的两条切线，沿圆弧到所在段两端的核心结点
+    def _exits(self):
+        coords, centers, radii = self.coords, self.centers, self.radii
+        n_circles = len(radii)
+        is_blocked = self.graph.is_blocked
+        exits = [[] for _ in range(len(coords))]
+        slots = {}
+        if n_circles:
+            rel = coords[:, None, :] - centers[None, :, :]
+            d = np.hypot(rel[..., 0], rel[..., 1])
+            phi = np.arctan2(rel[..., 1], rel[..., 0])
+            alpha = np.arccos(np.clip(radii[None] / d, -1.0, 1.0))
+            length = np.sqrt(np.maximum(d ** 2 - radii[None] ** 2, 0.0))
+            pts, circles = np.meshgrid(np.arange(len(coords)), np.arange(n_circles), indexing='ij')
+            pts = np.repeat(pts.ravel(), 2)
+            circles = np.repeat(circles.ravel(), 2)
+            thetas = np.stack([phi + alpha, phi - alpha], axis=-1).ravel() % _TWO_PI
+            lengths = np.repeat(length.ravel(), 2)
+            touch = centers[circles] + radii[circles, None] * np.stack([np.cos(thetas), np.sin(thetas)], axis=1)
+            hidden = segments_blocked(coords[pts], touch, centers, radii)
+            for s, i, theta, ell, hide in zip(pts.tolist(), circles.tolist(), thetas.tolist(),
+                                              lengths.tolist(), hidden.tolist()):
+                if hide or is_blocked(i, theta):
+                    continue
+                angles, kinds = self.bounds[i]
+                r = radii[i]
+                if not angles:
+                    slots.setdefault((i, 0), []).append((s, theta, ell, True))
+                    continue
+                q = bisect_right(angles, theta)
+                prev_angle, prev_kind = angles[q - 1], kinds[q - 1]
+                next_angle, next_kind = angles[q % len(angles)], kinds[q % len(angles)]
+                offset = (theta - prev_angle) % _TWO_PI
+                if prev_kind >= 0:
+                    exits[s].append((prev_kind, ell + r * offset))
+                if next_kind >= 0:
+                    exits[s].append((next_kind, ell + r * ((next_angle - theta) % _TWO_PI)))
+                slots.setdefault((i, q % len(angles)), []).append((s, offset, ell, False))
+        self.exits, self.slots = exits, slots
+
+    # 指定若干行（源点）到所有点的最短距离；直线可见只检查 pairs 为真的位置，其余位置不取直线
+    def _rows(self, rows, pairs):
+        coords, centers, radii = self.coords, self.centers, self.radii
+        n = len(coords)
+        position = {int(s): k for k, s in enumerate(rows)}
+        result = np.full((len(rows), n), np.inf)
+        src, dst = np.nonzero(pairs)
+        a, b = coords[rows[src]], coords[dst]
+        visible = ~segments_blocked(a, b, centers, radii)
+        result[src[visible], dst[visible]] = np.hypot(*(a[visible] - b[visible]).T)
+
+        # 同一段圆弧上直接相接：s 切入、沿弧走到 t 的切点再切出
+        for (i, _), members in self.slots.items():
+            r = radii[i]
+            pts = np.array([m[0] for m in members])
+            pos = np.array([m[1] for m in members])
+            ell = np.array([m[2] for m in members])
+            arc = np.abs(pos[:, None] - pos[None, :])
+            if members[0][3]:
+                # 整个圆上没有任何边界，两个方向都能走
+                arc = np.minimum(arc, _TWO_PI - arc)
+            cost = ell[:, None] + ell[None, :] + r * arc
+            keep = np.array([int(p) in position for p in pts])
+            if not keep.any():
+                continue
+            src = np.array([position[int(p)] for p in pts[keep]])
+            sub = cost[keep]
+            np.minimum.at(result, (np.repeat(src, len(pts)), np.tile(pts, len(src))), sub.ravel())
+
+        # 经过核心结点：出口代价 + 核心最短路 + 入口代价
+        if len(self.core):
+            width = max((len(e) for e in self.exits), default=0)
+            if width:
+                idx = np.zeros((n, width), dtype=np.int64)
+                val = np.full((n, width), np.inf)
+                for s, entries in enumerate(self.exits):
+                    for k, (node, cost) in enumerate(entries):
+                        idx[s, k], val[s, k] = node, cost
+                # 以 s 的全部出口为多源的 Dijkstra 结果：W[s, k] = min_e (val + core[e, k])
+                reach = (val[rows][:, :, None] + self.core[idx[rows]]).min(axis=1)
+                step = max(1, 2000000 // max(n * width, 1))
+                for start in range(0, len(rows), step):
+                    part = reach[start:start + step]
+                    via = (part[:, idx] + val[None]).min(axis=2)
+                    result[start:start + step] = np.minimum(result[start:start + step], via)
+        result[np.arange(len(rows)), rows] = 0.0
+        return result
+
+
+# 按 (点集, 障碍物集合, 安全距离) 缓存；请求的障碍物集合只比某个已缓存集合多出几个时，
+# 复制那份结果再逐个增量加入多出的障碍物；与 distance_matrix.py 共用字节上限，放不下的不缓存
+_cache = OrderedDict()
+_CACHE_SIZE = 8
+
+def obstacle_distance_matrix(points, obstacles, margin=0.0):
+    items = instance_items(points)
+    wanted = tuple(tuple(map(float, obstacle)) for obstacle in obstacles)
+    key = (items, frozenset(wanted), margin)
+    if key in _cache:
+        _cache.move_to_end(key)
+        solver = _cache[key]
+    else:
+        base = None
+        for (cached_items, cached_set, cached_margin), cached in _cache.items():
+            if cached_items == items and cached_margin == margin and cached_set <= key[1]:
+                if base is None or len(cached_set) > len(base.obstacles):
+                    base = cached
+        if base is None:
+            solver = VisibilityDistance(points, wanted, margin)
+        else:
+            solver = VisibilityDistance.__new__(VisibilityDistance)
+            solver.__dict__.update(base.__dict__)
+            solver.obstacles = list(base.obstacles)
+            solver.graph = base.graph.copy()
+            solver.matrix = base.matrix.copy()
+            for obstacle in wanted:
+                if obstacle not in solver.obstacles:
+                    solver.add_obstacle(obstacle)
+        if solver.matrix.nbytes <= CACHE_BYTES:
+            _cache[key] = solver
+            while len(_cache) > _CACHE_SIZE or sum(s.matrix.nbytes for s in _cache.values()) > CACHE_BYTES:
+                _cache.popitem(last=False)
+    matrix = solver.matrix.view()
+    matrix.flags.writeable = False
+    return matrix, list(solver.locations)
@@ -0,0 +1,294 @@
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import platform
+import tracemalloc
+import multiprocessing
+import numpy as np
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+for sub in ("VRP", "Cluster"):
+    if os.path.join(ROOT, sub) not in sys.path:
+        sys.path.append(os.path.join(ROOT, sub))
+
+# 求解器模块在主进程里导入一次，子进程 fork 后直接继承，导入开销不计入运行时间
+import T1_tjh
+import T1_tjh_cluster
+import T1
+import anytime
+import T3
+import T1_Cluster
+from drone import Drone
+from task import Task
+from obstacle import Obstacle
+from instances import FAMILIES, make_instance
+
+# 各求解器的规模基准：同一组带种子的合成实例分别交给仓库里的每个求解器，
+# 记录运行时间、内存峰值、总飞行距离和完成时间（最慢一架无人机的用时），结果写成 JSON；
+# 给定基线文件时逐项比较，超过回归阈值就以非零状态退出
+# 每个用例在独立子进程里运行（互不影响内存峰值，也能对死循环或超时的求解器设上限），
+# 内存峰值另开一个子进程冷启动测量
+# 稀疏节约值、局部搜索等变体另与全量节约算法对照，列出同一实例上的距离偏差和用时
+
+UAV_SPEED = 50  # m/s，与各求解器一致
+PLAIN_FAMILIES = FAMILIES[:-1]  # 不考虑障碍物的求解器只跑这几族
+SIZES = (5, 10, 50, 100, 500, 1000, 5000, 10000, 100000)
+
+
+# 机队规模随目标数增长
+def fleet_size(n):
+    return 3 if n <= 50 else min(50, n // 20)
+
+def route_summary(lengths):
+    lengths = list(lengths)
+    return float(sum(lengths)), float(max(lengths, default=0.0)) / UAV_SPEED
+
+
+# ---------------- 求解器适配 ----------------
+# 每个适配函数接收 (points, obstacles, m)，返回 (总距离, 完成时间)；
+# 距离统一按每架无人机最后回到基地计算，只求开放路径的求解器补上返回段
+def run_exact_partition(points, obstacles, m):
+    targets = [xy for name, xy in points.items() if name != "depot"]
+    _, groups = T1_tjh.solve(targets, m)
+    dist = T1_tjh.build_distance_matrix(targets)
+    lengths = []
+    for group in groups:
+        path = [0] + [idx + 1 for idx in group] + [0]
+        lengths.append(sum(dist[a, b] for a, b in zip(path, path[1:])))
+    return route_summary(lengths)
+
+def run_cluster_first(points, obstacles, m):
+    coords = [xy for name, xy in points.items() if name != "depot"]
+    routes, _, _ = T1_tjh_cluster.cluster_first_route_second(coords, m)
+    # 返回距离补上回到基地的一段
+    lengths = [length + math.hypot(*coords[route[-1]]) if len(route) else 0.0 for route, length in routes]
+    return route_summary(lengths)
+
+def run_savings(points, obstacles, m):
+    routes, _ = T1.clarke_wright_savings(points, m, obstacles=obstacles or None)
+    return route_summary(route["distance"] for route in routes)
+
+# 稀疏模式没有障碍物版本，不参加 obstacles 实例族
+def run_sparse_savings(points, obstacles, m):
+    routes, _ = T1.clarke_wright_savings(points, m, neighbors=10)
+    return route_summary(route["distance"] for route in routes)
+
+def run_savings_local_search(points, obstacles, m):
+    routes, _ = T1.clarke_wright_savings(points, m, improve=True, obstacles=obstacles or None)
+    return route_summary(route["distance"] for route in routes)
+
+def run_sweep(points, obstacles, m):
+    routes, _ = T1.sweep_routes(points, m)
+    return route_summary(route["distance"] for route in routes)
+
+def run_anytime(points, obstacles, m):
+    routes, _, _ = anytime.plan_anytime(points, m, deadline_ms=1000)
+    return route_summary(route["distance"] for route in routes)
+
+def run_layered_greedy(points, obstacles, m):
+    drones = [T3.Drone(f"U{i+1}", 15, 500, 30) for i in range(m)]
+    tasks = [T3.Task(i + 1, "普通投放", xy, 2, 0) for i, (name, xy) in enumerate(points.items()) if name != "depot"]
+    T3.assign_tasks(drones, tasks)
+    back = [d.calculate_distance((0, 0)) for d in drones]
+    return (float(sum(d.total_distance for d in drones) + sum(back)),
+            float(max(d.current_time() + b / UAV_SPEED for d, b in zip(drones, back))))
+
+def run_leader_greedy(points, obstacles, m):
+    specs = [(15, 500, 30), (10, 600, 60), (20, 450, 20)]
+    drones = [Drone(f"U{i+1}", *specs[i % len(specs)]) for i in range(m)]
+    tasks = [Task(name, xy, "normal", 2, 0) for name, xy in points.items() if name != "depot"]
+    # 该求解器只支持一个障碍物，取最大的一个
+    obstacle = None
+    if obstacles:
+        x, y, r = max(obstacles, key=lambda o: o[2])
+        obstacle = Obstacle((x, y), r)
+    T1_Cluster.assign_tasks(drones, tasks, obstacle)
+    lengths = [sum(math.hypot(x2 - x1, y2 - y1) for (x1, y1), (x2, y2) in zip(d.path, d.path[1:])) for d in drones]
+    return float(sum(lengths)), float(max(d.time_used for d in drones))
+
+# 名称 -> (适配函数, 最大目标数, 适用的实例族)
+SOLVERS = {
+    "T1_tjh.solve": (run_exact_partition, 12, PLAIN_FAMILIES),
+    "T1_tjh_cluster.cluster_first_route_second": (run_cluster_first, 10000, PLAIN_FAMILIES),
+    "VRP.T1.clarke_wright_savings": (run_savings, 5000, FAMILIES),
+    "VRP.T1.clarke_wright_savings[k=10]": (run_sparse_savings, 100000, PLAIN_FAMILIES),
+    "VRP.T1.clarke_wright_savings+local_search": (run_savings_local_search, 2000, FAMILIES),
+    "VRP.T1.sweep_routes": (run_sweep, 100000, PLAIN_FAMILIES),
+    "VRP.anytime.plan_anytime[1s]": (run_anytime, 10000, PLAIN_FAMILIES),
+    "VRP.T3.assign_tasks": (run_layered_greedy, 5000, PLAIN_FAMILIES),
+    "Cluster.T1_Cluster.assign_tasks": (run_leader_greedy, 500, FAMILIES),
+}
+# 只部分考虑障碍物的求解器，obstacles 族的结果带上这条说明（记录的 note 字段）
+OBSTACLE_NOTES = {"Cluster.T1_Cluster.assign_tasks": "只绕开最大的一个障碍物，其余忽略"}
+# 障碍物版距离矩阵是 n×n 的可见图最短路，规模单独限制
+OBSTACLE_LIMIT = {"VRP.T1.clarke_wright_savings": 1000, "VRP.T1.clarke_wright_savings+local_search": 1000}
+# 需要与全量节约算法对照的变体：稀疏节约值的偏差、局部搜索的改进幅度
+# 变体与参照在同一实例族上的处理方式相同（obstacles 族两者都绕障碍物）时才有可比性，
+# 只有两者都跑了的用例才会对照
+COMPARISONS = (("VRP.T1.clarke_wright_savings[k=10]", "VRP.T1.clarke_wright_savings"),
+               ("VRP.T1.clarke_wright_savings+local_search", "VRP.T1.clarke_wright_savings"))
+
+
+# ---------------- 运行 ----------------
+# memory=False 时只计时；memory=True 时只在 tracemalloc 下跑一次取内存峰值，tracemalloc 的开销不计入运行时间
+def _measure(solver, family, n, seed, memory, queue):
+    run, _, _ = SOLVERS[solver]
+    points, obstacles = make_instance(family, n, seed)
+    m = fleet_size(n)
+    sys.stdout = open(os.devnull, "w")
+    if memory:
+        tracemalloc.start()
+        run(points, obstacles, m)
+        queue.put({"peak_memory_mb": tracemalloc.get_traced_memory()[1] / 2**20})
+        tracemalloc.stop()
+        return
+    start = time.perf_counter()
+    distance, makespan = run(points, obstacles, m)
+    runtime = time.perf_counter() - start
+    queue.put({"vehicles": m, "runtime_s": runtime, "distance": distance, "makespan_s": makespan})
+
+def _run_isolated(solver, family, n, seed, timeout, memory):
+    context = multiprocessing.get_context("fork")
+    queue = context.Queue()
+    process = context.Process(target=_measure, args=(solver, family, n, seed, memory, queue))
+    process.start()
+    process.join(timeout)
+    if process.is_alive():
+        process.kill()
+        process.join()
+        return "timeout", None
+    if queue.empty():
+        return f"error (exit code {process.exitcode})", None
+    return "ok", queue.get()
+
+# 计时和内存各在一个新 fork 的子进程里跑：主进程从不运行求解器，
+# 所以两次都是冷启动（距离矩阵、局部搜索、可见图等进程内缓存都是空的）
+def run_case(solver, family, n, seed=0, timeout=120.0, memory=True):
+    record = {"solver": solver, "family": family, "n": n, "seed": seed}
+    status, result = _run_isolated(solver, family, n, seed, timeout, memory=False)
+    record["status"] = status
+    if status != "ok":
+        return record
+    record.update(result, peak_memory_mb=None)
+    if memory:
+        status, result = _run_isolated(solver, family, n, seed, timeout, memory=True)
+        if status == "ok":
+            record.update(result)
+    return record
+
+def run_suite(solvers=None, families=FAMILIES, sizes=SIZES, seed=0, timeout=120.0, memory=True):
+    results = []
+    for solver in solvers or SOLVERS:
+        _, max_n, allowed = SOLVERS[solver]
+        for family in families:
+            if family not in allowed:
+                continue
+            limit = OBSTACLE_LIMIT.get(solver, max_n) if family == "obstacles" else max_n
+            for n in sizes:
+                if n > limit:
+                    continue
+                record = run_case(solver, family, n, seed, timeout, memory)
+                if family == "obstacles" and solver in OBSTACLE_NOTES:
+                    record["note"] = OBSTACLE_NOTES[solver]
+                results.append(record)
+                if record["status"] == "ok":
+                    memory_text = "" if record["peak_memory_mb"] is None else f"  {record['peak_memory_mb']:8.1f} MB"
+                    note_text = f"  （{record['note']}）" if "note" in record else ""
+                    print(f"{solver:<44} {family:<9} n={n:<6} {record['runtime_s']:9.3f} s{memory_text}"
+                          f"  距离 {record['distance']:12.1f} 米  完成时间 {record['makespan_s']:9.1f} 秒{note_text}")
+                else:
+                    print(f"{solver:<44} {family:<9} n={n:<6} {record['status']}")
+    return results
+
+# 同一实例上变体与参照求解器的总距离偏差和用时，两者都成功的用例才列出
+def compare_variants(results):
+    ok = {(r["solver"], r["family"], r["n"]): r for r in results if r["status"] == "ok"}
+    lines = []
+    for variant, reference in COMPARISONS:
+        for (solver, family, n), record in ok.items():
+            base = ok.get((reference, family, n))
+            if solver != variant or base is None:
+                continue
+            deviation = record["distance"] / base["distance"] - 1
+            lines.append(f"{variant} vs {reference} {family} n={n}: 距离 {deviation:+.2%}，"
+                         f"用时 {record['runtime_s']:.2f} s / {base['runtime_s']:.2f} s")
+    return lines
+
+# 与基线逐项比较：运行时间和内存按相对阈值（绝对值很小的不计，避免计时噪声），
+# 距离和完成时间按各自的相对阈值；基线里成功、这次失败也算回归
+def find_regressions(results, baseline, thresholds):
+    previous = {(r["solver"], r["family"], r["n"], r["seed"]): r for r in baseline["results"]}
+    floors = {"runtime_s": 0.05, "peak_memory_mb": 1.0, "distance": 0.0, "makespan_s": 0.0}
+    regressions = []
+    for record in results:
+        old = previous.get((record["solver"], record["family"], record["n"], record["seed"]))
+        if old is None or old["status"] != "ok":
+            continue
+        label = f"{record['solver']} {record['family']} n={record['n']}"
+        if record["status"] != "ok":
+            regressions.append(f"{label}: {record['status']}")
+            continue
+        for metric, limit in thresholds.items():
+            before, after = old.get(metric), record.get(metric)
+            if before is None or after is None or after <= floors[metric]:
+                continue
+            if after > before * (1 + limit) and after - before > floors[metric]:
+                regressions.append(f"{label}: {metric} {before:.4g} -> {after:.4g} (+{after / before - 1:.1%})")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="无人机规划求解器规模基准")
+    parser.add_argument("--solvers", nargs="*", choices=list(SOLVERS), help="默认全部")
+    parser.add_argument("--families", nargs="*", choices=FAMILIES, default=list(FAMILIES))
+    parser.add_argument("--sizes", nargs="*", type=int, default=list(SIZES))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=120.0, help="单个用例的时间上限（秒）")
+    parser.add_argument("--no-memory", action="store_true", help="不测内存峰值（省掉第二次运行）")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", help="基线 JSON，给定时检查回归")
+    parser.add_argument("--runtime-threshold", type=float, default=0.25)
+    parser.add_argument("--memory-threshold", type=float, default=0.25)
+    parser.add_argument("--quality-threshold", type=float, default=0.01, help="距离与完成时间的相对阈值")
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.solvers, args.families, args.sizes, args.seed, args.timeout, not args.no_memory)
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"结果已写入 {args.output}")
+    comparisons = compare_variants(results)
+    if comparisons:
+        print("与全量节约算法对照：")
+        for line in comparisons:
+            print(f"  {line}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        thresholds = {"runtime_s": args.runtime_threshold, "peak_memory_mb": args.memory_threshold,
+                      "distance": args.quality_threshold, "makespan_s": args.quality_threshold}
+        regressions = find_regressions(results, baseline, thresholds)
+        if regressions:
+            print("发现性能回归：")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("未发现超过阈值的回归")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
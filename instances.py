@@ -0,0 +1,40 @@
+import math
+import numpy as np
+
+# 合成测试实例，benchmark.py 的规模基准和 VRP/ 下各求解器的示例共用这一个生成器
+# 同一 (族, 规模, 种子) 总是生成同一组目标点；points 与各求解器的输入格式相同：
+# {'depot': (0.0, 0.0), 'T1': (x, y), ...}，obstacles 为 [(x, y, radius), ...]
+
+FAMILIES = ("uniform", "clustered", "ring", "obstacles")
+
+
+# uniform：方形区域均匀分布；clustered：若干高斯簇；ring：以基地为圆心的环带；
+# obstacles：密集的圆形障碍物，目标点落在障碍物之外
+def make_instance(family, n, seed=0, size=5000):
+    rng = np.random.default_rng(seed)
+    obstacles = []
+    if family == "uniform":
+        coords = rng.uniform(0, size, (n, 2))
+    elif family == "clustered":
+        centers = rng.uniform(0, size, (max(n // 200, 2), 2))
+        coords = centers[rng.integers(len(centers), size=n)] + rng.normal(0, size / 40, (n, 2))
+    elif family == "ring":
+        radius = size * (0.8 + rng.normal(0, 0.03, n))
+        angle = rng.uniform(0, 2 * math.pi, n)
+        coords = np.stack([radius * np.cos(angle), radius * np.sin(angle)], axis=1)
+    elif family == "obstacles":
+        centers = rng.uniform(size * 0.1, size, (12, 2))
+        radii = rng.uniform(size * 0.02, size * 0.06, 12)
+        obstacles = [(float(x), float(y), float(r)) for (x, y), r in zip(centers, radii)]
+        coords = np.empty((0, 2))
+        while len(coords) < n:
+            batch = rng.uniform(0, size, (2 * (n - len(coords)) + 10, 2))
+            gap = np.hypot(batch[:, None, 0] - centers[None, :, 0], batch[:, None, 1] - centers[None, :, 1])
+            batch = batch[(gap > radii[None] + 10).all(axis=1)]
+            coords = np.vstack([coords, batch])[:n]
+    else:
+        raise ValueError(f"未知的实例族 {family}")
+    points = {"depot": (0.0, 0.0)}
+    for i, (x, y) in enumerate(coords):
+        points[f"T{i+1}"] = (float(x), float(y))
+    return points, obstacles
@@ -0,0 +1,128 @@
+import os
+import json
+import time
+import atexit
+import tracemalloc
+from collections import defaultdict
+
+# 可开关的性能埋点：计数器（A* 扩展结点、距离计算、线段与障碍物相交检测、约束检查等）、
+# 各规划阶段的计时器，以及可选的 tracemalloc 内存快照，每次运行可导出一份 JSON
+# 关闭时热点处只多一次属性判断：埋点统一写成
+#     if profiler.enabled:
+#         profiler.count("a_star.expansions")
+# 阶段计时用 with profiler.phase("savings"): ...，关闭时返回一个什么都不做的上下文
+# 环境变量 PLAN_PROFILE=1 开启（=memory 时同时记录内存），PLAN_PROFILE_OUT 给定时退出前自动导出
+
+
+class _NullPhase:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_PHASE = _NullPhase()
+
+
+class _Phase:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        stack = self.profiler._stack
+        # 嵌套阶段按路径记录，如 "plan/savings"
+        self.path = f"{stack[-1]}/{self.name}" if stack else self.name
+        stack.append(self.path)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        profiler = self.profiler
+        profiler._stack.pop()
+        profiler.timers[self.path] += elapsed
+        profiler.phase_calls[self.path] += 1
+        if profiler.memory:
+            profiler.snapshot(self.path)
+        return False
+
+
+class Profiler:
+    """全局埋点，默认关闭"""
+
+    def __init__(self):
+        self.enabled = False
+        self.memory = False
+        self.reset()
+
+    def reset(self):
+        self.counters = defaultdict(int)
+        self.timers = defaultdict(float)
+        self.phase_calls = defaultdict(int)
+        self.snapshots = []
+        self._stack = []
+        self.started = time.perf_counter()
+
+    def enable(self, memory=False):
+        self.enabled = True
+        self.memory = memory
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def disable(self):
+        self.enabled = False
+        if self.memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.memory = False
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    def phase(self, name):
+        if not self.enabled:
+            return _NULL_PHASE
+        return _Phase(self, name)
+
+    # 记录当前与峰值内存，以及分配最多的几处代码
+    def snapshot(self, label, top=5):
+        if not tracemalloc.is_tracing():
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        stats = tracemalloc.take_snapshot().statistics("lineno")[:top]
+        self.snapshots.append({
+            "label": label,
+            "elapsed_s": time.perf_counter() - self.started,
+            "current_mb": current / 2**20,
+            "peak_mb": peak / 2**20,
+            "top": [{"where": str(stat.traceback), "size_kb": stat.size / 1024, "count": stat.count}
+                    for stat in stats],
+        })
+
+    def report(self):
+        return {
+            "wall_time_s": time.perf_counter() - self.started,
+            "counters": dict(sorted(self.counters.items())),
+            "phases": {name: {"total_s": self.timers[name], "calls": self.phase_calls[name]}
+                       for name in sorted(self.timers)},
+            "memory": self.snapshots,
+        }
+
+    def export(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, ensure_ascii=False, indent=2)
+
+    def summary(self):
+        lines = [f"{name:<40} {value:>12}" for name, value in sorted(self.counters.items())]
+        lines += [f"{name:<40} {self.timers[name]:>10.4f} s  x{self.phase_calls[name]}"
+                  for name in sorted(self.timers)]
+        return "\n".join(lines)
+
+
+profiler = Profiler()
+
+_mode = os.environ.get("PLAN_PROFILE")
+if _mode and _mode != "0":
+    profiler.enable(memory=_mode == "memory")
+    if os.environ.get("PLAN_PROFILE_OUT"):
+        atexit.register(lambda: profiler.export(os.environ["PLAN_PROFILE_OUT"]))
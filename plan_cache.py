@@ -0,0 +1,261 @@
+import io
+import os
+import sys
+import time
+import zlib
+import pickle
+import struct
+import hashlib
+import numbers
+import tempfile
+import numpy as np
+
+# 规划结果的磁盘缓存：同一组目标点、机队、障碍物和求解参数只解一次
+# 键为实例与参数规范化编码后的 SHA-256（内容寻址），与字典顺序、整数/整值浮点数写法、
+# 元组/列表之分无关；值用 pickle 序列化后 zlib 压缩存成一个文件
+# 按最近访问时间（文件 mtime，命中时刷新）做 LRU，目录总大小超过上限时从最久未用的开始删除
+# 默认关闭，环境变量 PLAN_CACHE=1 时开启；目录默认为仓库根目录下的 .plan_cache（已在 .gitignore 中），
+# 可用 PLAN_CACHE_DIR 指定
+# 键里还包含求解器源码的哈希：改了求解器所在目录下任何 .py 文件，旧结果自动失效，不必手动改版本号
+# 求解时打印的内容与结果一起存下，命中时原样输出，有无缓存输出一致
+# 注意：缓存文件用 pickle 读取，读入等于执行其中的代码，PLAN_CACHE_DIR 只能指向自己可信的目录，
+# 不要使用来源不明的缓存文件；新建的缓存目录权限为 0700
+
+_MAGIC = b"PLAN2"
+_SUFFIX = ".plan"
+
+
+# 规范化编码：每个值写成 类型标记 + 内容，容器递归展开，dict/set 按编码排序
+def _canonical(obj, out):
+    if obj is None or isinstance(obj, bool):
+        out += b"N" if obj is None else (b"T" if obj else b"F")
+    elif isinstance(obj, np.ndarray):
+        data = np.ascontiguousarray(obj)
+        header = f"{data.dtype.str}{data.shape}".encode()
+        out += b"A" + struct.pack("<I", len(header)) + header + data.tobytes()
+    elif isinstance(obj, numbers.Integral):
+        text = str(int(obj)).encode()
+        out += b"I" + struct.pack("<I", len(text)) + text
+    elif isinstance(obj, numbers.Real):
+        value = float(obj)
+        if value.is_integer():
+            _canonical(int(value), out)
+        else:
+            out += b"R" + struct.pack("<d", value)
+    elif isinstance(obj, str):
+        text = obj.encode()
+        out += b"S" + struct.pack("<I", len(text)) + text
+    elif isinstance(obj, bytes):
+        out += b"B" + struct.pack("<I", len(obj)) + obj
+    elif isinstance(obj, (list, tuple)):
+        out += b"L" + struct.pack("<I", len(obj))
+        for item in obj:
+            _canonical(item, out)
+    elif isinstance(obj, dict):
+        items = sorted((_encode(key), _encode(value)) for key, value in obj.items())
+        out += b"D" + struct.pack("<I", len(items))
+        for key, value in items:
+            out += key + value
+    elif isinstance(obj, (set, frozenset)):
+        items = sorted(_encode(item) for item in obj)
+        out += b"E" + struct.pack("<I", len(items)) + b"".join(items)
+    elif hasattr(obj, "__dict__"):
+        # Task、Drone、Obstacle 这类普通对象按类名和属性编码
+        out += b"O"
+        _canonical(type(obj).__qualname__, out)
+        _canonical(vars(obj), out)
+    else:
+        raise ValueError(f"无法为缓存键编码类型 {type(obj).__name__}")
+    return out
+
+def _encode(obj):
+    return bytes(_canonical(obj, bytearray()))
+
+# 实例与参数的内容哈希
+def instance_key(*parts):
+    return hashlib.sha256(_encode(parts)).hexdigest()
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class PlanCache:
+    """内容寻址的规划结果缓存，max_bytes 为目录总大小上限"""
+
+    def __init__(self, directory=None, max_bytes=256 * 1024 * 1024):
+        if directory is None:
+            directory = os.environ.get(
+                "PLAN_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".plan_cache"))
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        # 目录总大小的估计：第一次写入时扫描一遍，之后累加写入的大小，超过上限才重新扫描淘汰
+        self._estimate = None
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + _SUFFIX)
+
+    def get(self, key, default=None):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                blob = f.read()
+        except FileNotFoundError:
+            self.misses += 1
+            return default
+        if not blob.startswith(_MAGIC):
+            self.misses += 1
+            return default
+        try:
+            value = pickle.loads(zlib.decompress(blob[len(_MAGIC):]))
+        except Exception:
+            # 文件损坏（如写入中断）时当作未命中，并删掉坏文件
+            _remove(path)
+            self.misses += 1
+            return default
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            # 读完后被其他进程淘汰，值已经读到，照常返回
+            pass
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        path = self._path(key)
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        blob = _MAGIC + zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), 6)
+        # 先写临时文件再改名，并发或中断时不会留下半个文件
+        fd, temp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(blob)
+        os.replace(temp, path)
+        if self._estimate is None:
+            self.evict()
+        else:
+            self._estimate += len(blob)
+            if self._estimate > self.max_bytes:
+                self.evict()
+
+    # 按最近访问时间淘汰，直到目录总大小不超过上限的 90%（留出余量，不必每次写入都扫描）；
+    # 其他进程同时淘汰时文件可能已不存在，跳过即可
+    def evict(self):
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(_SUFFIX):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, path))
+                    total += stat.st_size
+        if total > self.max_bytes:
+            target = self.max_bytes * 0.9
+            entries.sort()
+            for _, size, path in entries:
+                if total <= target:
+                    break
+                _remove(path)
+                total -= size
+        self._estimate = total
+
+    def clear(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(_SUFFIX):
+                    _remove(os.path.join(root, name))
+        self._estimate = 0
+
+
+_default = None
+
+def default_cache():
+    global _default
+    if _default is None:
+        _default = PlanCache()
+    return _default
+
+# 求解器源码的哈希：solve 所在目录下全部 .py 文件的内容，按 (文件名, mtime, 大小) 记忆，同一进程内不重复读取
+_code_hashes = {}
+
+def code_version(solve):
+    directory = os.path.dirname(os.path.abspath(solve.__code__.co_filename))
+    names = sorted(name for name in os.listdir(directory) if name.endswith(".py"))
+    stamp = []
+    for name in names:
+        stat = os.stat(os.path.join(directory, name))
+        stamp.append((name, stat.st_mtime_ns, stat.st_size))
+    stamp = (directory, tuple(stamp))
+    if stamp not in _code_hashes:
+        digest = hashlib.sha256()
+        for name in names:
+            with open(os.path.join(directory, name), "rb") as f:
+                digest.update(name.encode() + b"\0" + f.read() + b"\0")
+        _code_hashes[stamp] = digest.hexdigest()
+    return _code_hashes[stamp]
+
+
+# 求解时同时写到原来的输出和缓冲区，缓存未命中时输出照常打印，又能存下来
+class _Tee(io.TextIOBase):
+    def __init__(self, stream):
+        self.stream = stream
+        self.buffer = io.StringIO()
+
+    def write(self, text):
+        self.buffer.write(text)
+        return self.stream.write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+
+# 带缓存求解：namespace 区分不同求解器，instance 为决定结果的全部输入，solve 为无参调用，未命中时才执行
+# 键中含 solve 所在目录的源码哈希，求解器改动后旧结果自动失效
+# 未传 cache 时只有环境变量 PLAN_CACHE=1 才使用缓存；求解过程中打印的内容命中时原样重放
+def cached_solve(namespace, instance, solve, cache=None):
+    if cache is None:
+        if os.environ.get("PLAN_CACHE") != "1":
+            return solve()
+        cache = default_cache()
+    key = instance_key(namespace, code_version(solve), instance)
+    missing = object()
+    entry = cache.get(key, missing)
+    if entry is not missing:
+        value, output = entry
+        sys.stdout.write(output)
+        return value
+    tee = _Tee(sys.stdout)
+    stdout, sys.stdout = sys.stdout, tee
+    try:
+        value = solve()
+    finally:
+        sys.stdout = stdout
+    cache.put(key, (value, tee.buffer.getvalue()))
+    return value
+
+
+if __name__ == "__main__":
+    cache = PlanCache(tempfile.mkdtemp(), max_bytes=4096)
+    points = {"depot": (0, 0), "T1": (1200, 800), "T2": (300, 450)}
+
+    def slow_solve():
+        time.sleep(0.2)
+        print("  求解中……")
+        return [["depot", "T1", "T2", "depot"]]
+
+    for attempt in range(2):
+        start = time.perf_counter()
+        cached_solve("demo/v1", (points, 1), slow_solve, cache)
+        print(f"第{attempt + 1}次求解用时 {(time.perf_counter() - start) * 1000:.2f} ms")
+    reordered = {"T2": (300.0, 450.0), "T1": (1200, 800), "depot": (0, 0)}
+    print("字典顺序和整数写法不同仍命中：",
+          instance_key("demo/v1", (points, 1)) == instance_key("demo/v1", (reordered, 1)))